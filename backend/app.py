@@ -1,6 +1,6 @@
 
+import asyncio
 import os
-import shutil
 import uuid
 from datetime import datetime, date
 from typing import List, Optional, Literal
@@ -14,7 +14,9 @@ from pydantic import BaseModel, validator
 # Import only required services
 from services.pdf_parser import PDFParser
 from services.llm_service import LLMService
+from services.upstream import UpstreamUnavailable
 from models.student import TestResult
+from utils.uploads import save_upload_file
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -37,6 +39,7 @@ pdf_parser = PDFParser()
 
 # Create uploads folder
 os.makedirs("uploads", exist_ok=True)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 20 * 1024 * 1024))
 
 # ---------------- Models ----------------
 
@@ -94,6 +97,23 @@ async def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/metrics", tags=["Health Check"])
+async def metrics():
+    return {
+        "response_cache": llm_service.response_cache.stats() if llm_service.response_cache else None,
+        "single_flight": llm_service.single_flight.stats(),
+        "upstream": llm_service.upstream.stats(),
+    }
+
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable_handler(request, exc: UpstreamUnavailable):
+    # The model API is throttling or down even after retries; tell clients to back off rather than fail hard
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The AI service is busy, please try again shortly"},
+        headers={"Retry-After": "5"}
+    )
+
 @app.post("/upload-test-result")
 async def upload_test_result(file: UploadFile = File(...), student_id: str = "default_student"):
     if not file.filename.endswith('.pdf'):
@@ -101,16 +121,18 @@ async def upload_test_result(file: UploadFile = File(...), student_id: str = "de
     
     try:
         file_id = str(uuid.uuid4())
-        file_path = os.path.join("uploads", f"{file_id}_{file.filename}")
+        file_path = os.path.join("uploads", f"{file_id}_{os.path.basename(file.filename)}")
 
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Stream to disk in fixed-size chunks so memory per upload stays bounded
+        content_hash, size = await save_upload_file(file, file_path, max_bytes=MAX_UPLOAD_BYTES)
+        print(f"Saved test upload {file_path} ({size} bytes, sha256 {content_hash[:12]})")
 
-        test_results = pdf_parser.extract_test_results(file_path)
+        # PDF parsing is blocking; keep it off the event loop like the LLM calls
+        test_results = await asyncio.to_thread(pdf_parser.extract_test_results, file_path)
         if "error" in test_results:
             raise HTTPException(status_code=400, detail=test_results["error"])
 
-        weak_areas = llm_service.analyze_weak_areas(test_results)
+        weak_areas = await llm_service.analyze_weak_areas_async(test_results)
 
         test_result = TestResult(
             test_id=file_id,
@@ -124,8 +146,6 @@ async def upload_test_result(file: UploadFile = File(...), student_id: str = "de
             student_id=student_id
         )
 
-        os.remove(file_path)
-
         return {
             "test_result": test_result.dict(),
             "weak_areas": weak_areas,
@@ -133,15 +153,18 @@ async def upload_test_result(file: UploadFile = File(...), student_id: str = "de
             "message": "✅ Test result analyzed"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to process test: {str(e)}")
+    finally:
         if 'file_path' in locals() and os.path.exists(file_path):
             os.remove(file_path)
-        raise HTTPException(status_code=500, detail=f"Failed to process test: {str(e)}")
 
 @app.post("/generate-schedule")
 async def generate_schedule(request: ScheduleRequest):
     try:
-        schedule = llm_service.generate_revision_schedule(
+        schedule = await llm_service.generate_revision_schedule_async(
             weak_areas=request.weak_areas,
             study_time=request.study_time,
             days=request.days
@@ -157,7 +180,7 @@ async def generate_schedule(request: ScheduleRequest):
 @app.post("/ask-question")
 async def ask_question(request: QueryRequest):
     try:
-        answer = llm_service.explain_concept(
+        answer = await llm_service.explain_concept_async(
             topic=request.query,
             difficulty=request.difficulty_level,
             learning_style=request.learning_style
@@ -167,6 +190,8 @@ async def ask_question(request: QueryRequest):
             "answer": answer,
             "message": "✅ Answer generated"
         }
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to answer question: {str(e)}")
 
@@ -180,13 +205,15 @@ async def generate_practice_questions(
         if num_questions > 10:
             raise HTTPException(status_code=400, detail="Max 10 questions allowed")
         
-        questions = llm_service.generate_practice_questions(topic, difficulty, num_questions)
+        questions = await llm_service.generate_practice_questions_async(topic, difficulty, num_questions)
         return {
             "topic": topic,
             "questions": questions,
             "message": "✅ Practice questions generated"
         }
 
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate questions: {str(e)}")
 
@@ -197,24 +224,28 @@ async def check_answer(
     correct_answer: str
 ):
     try:
-        feedback = llm_service.check_answer(question, student_answer, correct_answer)
+        feedback = await llm_service.check_answer_async(question, student_answer, correct_answer)
         return {
             "question": question,
             "student_answer": student_answer,
             "feedback": feedback
         }
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to check answer: {str(e)}")
 
 @app.get("/search-content")
 async def search_content(query: str = Query(...), topic: Optional[str] = "", difficulty: str = "intermediate"):
     try:
-        result = llm_service.search_content(query=query, topic=topic, difficulty=difficulty)
+        result = await llm_service.search_content_async(query=query, topic=topic, difficulty=difficulty)
         return {
             "query": query,
             "result": result,
             "message": "✅ Content found"
         }
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
@@ -1,23 +1,66 @@
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
-    GOOGLE_API_KEY: str
+    # Required unless LLM_BACKEND is "stub"
+    GOOGLE_API_KEY: str = ""
+    LLM_BACKEND: str = "gemini"  # "gemini" or "stub"
+    LLM_STUB_LATENCY_MS: float = 800
+    LLM_STUB_LATENCY_SIGMA: float = 0.5
+    LLM_STUB_ERROR_RATE: float = 0.0
+    LLM_STUB_SEED: int = 0
 
-    FIREBASE_TYPE: str
-    FIREBASE_PROJECT_ID: str
-    FIREBASE_PRIVATE_KEY_ID: str
-    FIREBASE_PRIVATE_KEY: str
-    FIREBASE_CLIENT_EMAIL: str
-    FIREBASE_CLIENT_ID: str
-    FIREBASE_AUTH_URI: str
-    FIREBASE_TOKEN_URI: str
-    FIREBASE_AUTH_PROVIDER_CERT_URL: str
-    FIREBASE_CLIENT_CERT_URL: str
-    FIREBASE_UNIVERSE_DOMAIN: str
+    FIREBASE_TYPE: str = ""
+    FIREBASE_PROJECT_ID: str = ""
+    FIREBASE_PRIVATE_KEY_ID: str = ""
+    FIREBASE_PRIVATE_KEY: str = ""
+    FIREBASE_CLIENT_EMAIL: str = ""
+    FIREBASE_CLIENT_ID: str = ""
+    FIREBASE_AUTH_URI: str = ""
+    FIREBASE_TOKEN_URI: str = ""
+    FIREBASE_AUTH_PROVIDER_CERT_URL: str = ""
+    FIREBASE_CLIENT_CERT_URL: str = ""
+    FIREBASE_UNIVERSE_DOMAIN: str = ""
 
     CHROMA_PERSIST_DIR: str = "./chroma_db"
+    DEFAULT_SUBJECT: str = "physics"
+    VECTOR_BACKEND: str = "chroma"  # "chroma" or "numpy"
+    VECTOR_INDEX_DIR: str = "./vector_index"
+    VECTOR_INDEX_DTYPE: str = "float32"  # "float16" halves memory at some query speed
+    LEXICAL_INDEX_DIR: str = "./lexical_index"
+    HYBRID_VECTOR_WEIGHT: float = 1.0
+    HYBRID_LEXICAL_WEIGHT: float = 0.7  # 0 disables BM25 and falls back to vector-only search
+    HYBRID_CANDIDATES: int = 20
+    HYBRID_RRF_K: int = 60
     ALLOWED_ORIGINS: list[str] = ["http://localhost:3000" , "http://localhost:5173","https://learn-mate-omega.vercel.app" ]
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_BATCH_WINDOW_MS: float = 5.0
+    EMBEDDING_MAX_BATCH_SIZE: int = 32
+    EMBEDDING_CACHE_DIR: str = "./cache"
+    EMBEDDING_CACHE_SIZE: int = 10000
+    VECTOR_EXECUTOR_WORKERS: int = 4
+    MAX_UPLOAD_BYTES: int = 200 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    PDF_EXTRACT_WORKERS: int = 4
+    CHUNK_SIZE_TOKENS: int = 200
+    CHUNK_OVERLAP_TOKENS: int = 40
+    INGEST_MAX_CONCURRENT_JOBS: int = 1
+    INGESTION_MANIFEST_FILE: str = "ingestion_manifest.json"
+    LLM_RATE_PER_SECOND: float = 10
+    LLM_RATE_BURST: int = 20
+    LLM_INITIAL_CONCURRENCY: int = 8
+    LLM_MIN_CONCURRENCY: int = 1
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_LATENCY_TARGET_SECONDS: float = 8
+    LLM_MAX_RETRIES: int = 4
+    LLM_DEADLINE_SECONDS: float = 30
+    CONTEXT_TOKEN_BUDGET: int = 900
+    CONTEXT_PASSAGE_TOKENS: int = 150
+    CONTEXT_DUPLICATE_JACCARD: float = 0.8
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY: float = 0.92
+    ANSWER_CACHE_TTL_SECONDS: float = 3600
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
 
     class Config:
         env_file = ".env"
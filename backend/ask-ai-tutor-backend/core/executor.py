@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core.config import settings
+
+class BoundedExecutor:
+    """Fixed-size thread pool for blocking work, with queue-depth and wait-time metrics"""
+
+    def __init__(self, max_workers: int, name: str):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn on the pool; the event loop only awaits the result"""
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+
+        def task():
+            wait = time.perf_counter() - submitted_at
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, task)
+
+    def stats(self) -> dict:
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "avg_wait_ms": round(1000 * self._total_wait / started, 3) if started else 0.0,
+                "max_wait_ms": round(1000 * self._max_wait, 3),
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+# Shared by every VectorService so embedding and Chroma work never runs on the event loop
+vector_executor = BoundedExecutor(settings.VECTOR_EXECUTOR_WORKERS, "vector")
@@ -1,45 +1,33 @@
 import asyncio
-from services.pdf_service import PDFProcessor
-from services.vector_service import VectorService
+from typing import Optional
+from services.ingestion_service import IngestionService
 import os
-import json
 
-async def initialize_vector_db():
+async def initialize_vector_db(ingestion: Optional[IngestionService] = None):
     pdf_path = "./data/leph101.pdf"
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"PDF file not found at {pdf_path}")
 
     print("⚡ Initializing vector database...")
-    
-    # Process PDF
-    pdf_processor = PDFProcessor()
-    result = pdf_processor.process_and_save("leph101.pdf")
-    print(f"✅ PDF processed: {result}")
 
-    # Load processed data
-    vector_service = VectorService()
-    processed_path = f"./data/processed/leph101.json"
-    if not os.path.exists(processed_path):
-        raise FileNotFoundError(f"Processed file not found: {processed_path}")
+    ingestion = ingestion or IngestionService()
+    pdf_files = sorted(
+        name for name in os.listdir(ingestion.pdf_processor.data_dir)
+        if name.lower().endswith(".pdf")
+    )
 
-    with open(processed_path, "r") as f:
-        data = json.load(f)
+    # Only new or changed PDFs are extracted and embedded; the rest are skipped via the manifest
+    # Each PDF stays in the subject it was uploaded under; unseen ones go to the default subject
+    for pdf_filename in pdf_files:
+        result = await ingestion.ingest_pdf(pdf_filename, subject=ingestion.subject_of(pdf_filename))
+        print(f"✅ {pdf_filename} ready ({result.subject}): {result.pages} pages, {len(result.chapters)} chapters")
 
-    print(f"📖 Loading {len(data['chapters'])} chapters into vector DB...")
-    
-    total_docs = 0
-    for chapter, pages in data["chapters"].items():
-        for page_num, text in pages.items():
-            metadata = {
-                "source": "leph101.pdf",
-                "chapter": chapter,
-                "page": page_num,
-                "subject": "physics"
-            }
-            await vector_service.add_document(text=text, metadata=metadata)
-            total_docs += 1
+    # PDFs deleted from the data dir since the last run take their indexed documents with them
+    for pdf_filename, removed in (await ingestion.prune_missing(pdf_files)).items():
+        print(f"🗑️ {pdf_filename} no longer in the data dir, removed {removed} documents")
 
-    print(f"✅ Successfully loaded {total_docs} documents into vector DB")
+    for subject, size in (await ingestion.partitions.sizes()).items():
+        print(f"✅ Partition {subject} holds {size} documents")
 
 if __name__ == "__main__":
-    asyncio.run(initialize_vector_db())
\ No newline at end of file
+    asyncio.run(initialize_vector_db())
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime
 
 class ContentChunk(BaseModel):
     id: str
@@ -14,6 +14,7 @@ class TutorRequest(BaseModel):
     difficulty: str = "intermediate"
     learning_style: str = "visual"
     subject: str = "physics"
+    chapter: Optional[str] = None
 
 class TutorResponse(BaseModel):
     question: str
@@ -28,6 +29,21 @@ class PDFUpload(BaseModel):
     chapters: List[str]
     pages: int
 
+class IngestionJob(BaseModel):
+    job_id: str
+    filename: str
+    subject: str
+    status: str = "queued"  # "queued", "running", "completed", "skipped", "failed"
+    pages_extracted: int = 0
+    chunks_total: int = 0
+    chunks_embedded: int = 0
+    chunks_indexed: int = 0
+    result: Optional[PDFUpload] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 class UserProfile(BaseModel):
     user_id: str
     name: str
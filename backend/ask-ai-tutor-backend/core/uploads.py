@@ -0,0 +1,40 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+from fastapi import HTTPException, UploadFile
+from core.config import settings
+
+async def save_upload(
+    file: UploadFile,
+    destination: Path,
+    max_bytes: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> Tuple[str, int]:
+    """Stream an upload to disk in fixed-size chunks, returning its SHA-256 and size"""
+    max_bytes = max_bytes or settings.MAX_UPLOAD_BYTES
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_BYTES
+    digest = hashlib.sha256()
+    size = 0
+    # Write to a uniquely named file beside the destination so a rejected upload never replaces an
+    # existing file and concurrent uploads of the same name never write into each other's bytes
+    fd, partial_name = tempfile.mkstemp(dir=destination.parent, prefix=destination.name + ".", suffix=".part")
+    partial_path = Path(partial_name)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                block = await file.read(chunk_size)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"File exceeds the {max_bytes} byte upload limit")
+                digest.update(block)
+                out.write(block)
+        os.replace(partial_path, destination)
+    finally:
+        if partial_path.exists():
+            partial_path.unlink()
+
+    return digest.hexdigest(), size
@@ -1,9 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import ai_tutor, content
+from routers import ai_tutor, content, metrics
 from core.config import settings
 import asyncio
 from core.initializer import initialize_vector_db
+from core.executor import vector_executor
+from services.vector_partitions import vector_partitions
 
 app = FastAPI(title="Ask AI Tutor API", version="1.0.0")
 
@@ -18,11 +20,21 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
-    await initialize_vector_db()
+    # Reuse the upload path's ingestion service so startup and uploads share one extraction pool
+    await initialize_vector_db(content.ingestion_service)
+    await content.ingestion_jobs.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await content.ingestion_jobs.stop()
+    content.pdf_processor.shutdown()
+    vector_partitions.flush()
+    vector_executor.shutdown()
 
 
 app.include_router(ai_tutor.router, prefix="/api/v1")
 app.include_router(content.router, prefix="/api/v1")
+app.include_router(metrics.router, prefix="/api/v1")
 
 @app.get("/")
 def health_check():
@@ -1,12 +1,73 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from services.llm_service import LLMService
-from services.vector_service import VectorService
+from services.vector_partitions import vector_partitions
+from services.vector_service import VectorService, normalize_subject
+from services.answer_cache import answer_cache
+from services.upstream import UpstreamUnavailable
 from core.models import TutorRequest, TutorResponse
+from core.config import settings
+from typing import Optional
 import traceback
+import json
 
 router = APIRouter()
 llm = LLMService()
-vector_db = VectorService()
+
+async def _partition(request: TutorRequest) -> VectorService:
+    """Subject partition the request searches; unknown subjects are a 404 rather than a new empty collection"""
+    try:
+        known = vector_partitions.has(request.subject)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not known:
+        raise HTTPException(status_code=404, detail=f"Unknown subject: {request.subject}")
+    return await vector_partitions.get(request.subject)
+
+def _cache_scope(request: TutorRequest) -> str:
+    # Same normalization as partition routing, so "Physics" and "physics" share cached answers.
+    # Chapter-scoped questions must not be answered from a whole-subject cache entry, or vice versa
+    subject = normalize_subject(request.subject)
+    return f"{subject}/{request.chapter}" if request.chapter else subject
+
+def _format_sources(context: list) -> list:
+    return [
+        {
+            "chapter": ctx.get("chapter"),
+            "page": ctx.get("page"),
+            "excerpt": ctx.get("content", "")[:200] + "...",
+            "confidence": ctx.get("score", 0.0)
+        }
+        for ctx in context
+    ]
+
+def _build_response(query: str, answer: str, context: list) -> dict:
+    return {
+        "question": query,
+        "answer": answer,
+        "sources": _format_sources(context),
+        "confidence": sum(ctx.get("score", 0.0) for ctx in context) / max(len(context), 1),
+        "suggested_followups": []
+    }
+
+def _cached_response(request: TutorRequest, query_embedding) -> Optional[dict]:
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    return answer_cache.lookup(query_embedding, _cache_scope(request), request.difficulty)
+
+def _cache_response(request: TutorRequest, query_embedding, context: list, response: dict):
+    if not settings.ANSWER_CACHE_ENABLED:
+        return
+    answer_cache.store(
+        query_embedding,
+        _cache_scope(request),
+        request.difficulty,
+        source_ids=[ctx.get("id") for ctx in context],
+        response=response,
+    )
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 @router.post("/ask", response_model=TutorResponse)
 async def ask_question(request: TutorRequest):
@@ -16,10 +77,18 @@ async def ask_question(request: TutorRequest):
     print("  ➤ difficulty:", request.difficulty)
     print("  ➤ learning_style:", request.learning_style)
     print("  ➤ subject:", request.subject)
+    print("  ➤ chapter:", request.chapter)
 
     try:
+        partition = await _partition(request)
+        query_embedding = await vector_partitions.embed_query(request.query)
+        cached = _cached_response(request, query_embedding)
+        if cached is not None:
+            print("⚡ [ask_question] Semantic cache hit, skipping search and LLM")
+            return {**cached, "question": request.query}
+
         print("🔍 [ask_question] Calling Vector DB search...")
-        context = await vector_db.search(request.query)
+        context = await partition.search(request.query, query_embedding=query_embedding, chapter=request.chapter)
         print("📚 [ask_question] Vector DB search result:")
         print("  ➤", context)
 
@@ -31,21 +100,8 @@ async def ask_question(request: TutorRequest):
         print("🧠 [ask_question] Generated answer:")
         print("  ➤", answer)
 
-        response = {
-            "question": request.query,
-            "answer": answer,
-            "sources": [
-                {
-                    "chapter": ctx.get("chapter"),
-                    "page": ctx.get("page"),
-                    "excerpt": ctx.get("content", "")[:200] + "...",
-                    "confidence": ctx.get("score", 0.0)
-                }
-                for ctx in context
-            ],
-            "confidence": sum(ctx.get("score", 0.0) for ctx in context) / max(len(context), 1),
-            "suggested_followups": []
-        }
+        response = _build_response(request.query, answer, context)
+        _cache_response(request, query_embedding, context, response)
 
         print("✅ [ask_question] Final response:")
         print(response)
@@ -54,9 +110,71 @@ async def ask_question(request: TutorRequest):
     except HTTPException as http_exc:
         print(f"🚫 [ask_question] HTTPException {http_exc.status_code}: {http_exc.detail}")
         raise http_exc
+    except UpstreamUnavailable as e:
+        print(f"🚦 [ask_question] Gemini unavailable after retries: {e}")
+        raise HTTPException(status_code=503, detail="The AI tutor is busy, please try again shortly", headers={"Retry-After": "5"})
     except Exception as e:
         print("🔥 [ask_question] Unhandled Exception:")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+
+
+@router.post("/ask/stream")
+async def ask_question_stream(request: TutorRequest):
+    """Server-sent events: `sources` first, then `token` chunks, then `done` with the full TutorResponse"""
+    print(f"\n🔍 [ask_question_stream] query: {request.query} (subject: {request.subject})")
+
+    try:
+        partition = await _partition(request)
+        query_embedding = await vector_partitions.embed_query(request.query)
+        cached = _cached_response(request, query_embedding)
+        context = None
+        if cached is None:
+            context = await partition.search(request.query, query_embedding=query_embedding, chapter=request.chapter)
+            if not context:
+                raise HTTPException(status_code=404, detail="No relevant content found")
+    except HTTPException:
+        raise
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    async def events():
+        if cached is not None:
+            print("⚡ [ask_question_stream] Semantic cache hit, skipping search and LLM")
+            yield _sse("sources", {"sources": cached["sources"], "confidence": cached["confidence"]})
+            yield _sse("token", {"text": cached["answer"]})
+            yield _sse("done", {**cached, "question": request.query})
+            return
+
+        sources = _format_sources(context)
+        yield _sse("sources", {
+            "sources": sources,
+            "confidence": sum(ctx.get("score", 0.0) for ctx in context) / max(len(context), 1)
+        })
+
+        parts = []
+        try:
+            async for text in llm.stream_answer(request.query, context):
+                parts.append(text)
+                yield _sse("token", {"text": text})
+        except UpstreamUnavailable as e:
+            print(f"🚦 [ask_question_stream] Gemini unavailable after retries: {e}")
+            yield _sse("error", {"detail": "The AI tutor is busy, please try again shortly"})
+            return
+        except Exception as e:
+            traceback.print_exc()
+            yield _sse("error", {"detail": str(e)})
+            return
+
+        response = _build_response(request.query, "".join(parts), context)
+        _cache_response(request, query_embedding, context, response)
+        yield _sse("done", response)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,62 +1,61 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from core.config import settings
 from services.pdf_service import PDFProcessor
-from services.vector_service import VectorService
-from core.models import PDFUpload
+from services.vector_partitions import vector_partitions
+from services.vector_service import normalize_subject
+from services.ingestion_service import IngestionService
+from services.ingestion_jobs import IngestionJobQueue
+from core.models import IngestionJob
+from core.uploads import save_upload
+from typing import List
 import os
-import json
 import logging
 
 router = APIRouter()
 pdf_processor = PDFProcessor()
-vector_service = VectorService()
+ingestion_service = IngestionService(pdf_processor=pdf_processor, partitions=vector_partitions)
+ingestion_jobs = IngestionJobQueue(ingestion_service)
 
 logger = logging.getLogger("upload_pdf")
 
-@router.post("/upload-pdf", response_model=PDFUpload)
-async def upload_pdf(file: UploadFile = File(...)):
+@router.post("/upload-pdf", response_model=IngestionJob, status_code=202)
+async def upload_pdf(file: UploadFile = File(...), subject: str = Form(settings.DEFAULT_SUBJECT)):
     try:
-        file_location = f"./data/{file.filename}"
-        logger.info(f"Saving uploaded PDF to: {file_location}")
-
-        # Save file
-        with open(file_location, "wb+") as file_object:
-            file_object.write(await file.read())
-
-        logger.info(f"File saved. Starting PDF processing...")
-
-        # Process PDF
-        result = pdf_processor.process_and_save(file.filename)
-        logger.info(f"PDF processed: {result}")
-
-        # Load processed data
-        processed_path = f"./data/processed/{os.path.splitext(file.filename)[0]}.json"
-        if not os.path.exists(processed_path):
-            raise HTTPException(status_code=500, detail=f"Processed file not found: {processed_path}")
+        subject = normalize_subject(subject)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        with open(processed_path, "r") as f:
-            data = json.load(f)
-
-        logger.info(f"Loaded processed JSON with chapters: {list(data['chapters'].keys())}")
-
-        total_docs = 0
+    try:
+        filename = os.path.basename(file.filename)
+        file_location = pdf_processor.data_dir / filename
+        logger.info(f"Saving uploaded PDF to: {file_location}")
 
-        for chapter, pages in data["chapters"].items():
-            for page_num, text in pages.items():
-                metadata = {
-                    "source": file.filename,
-                    "chapter": chapter,
-                    "page": page_num,
-                    "subject": "physics"
-                }
+        # Stream to disk in chunks, hashing as we go
+        content_hash, size = await save_upload(file, file_location)
 
-            
-                doc_id = await vector_service.add_document(text=text, metadata=metadata)
-                total_docs += 1
-                logger.debug(f"Added doc ID {doc_id} (chapter: {chapter}, page: {page_num})")
+        logger.info(f"File saved ({size} bytes). Queueing ingestion...")
 
-        logger.info(f"✅ Added {total_docs} documents to vector DB.")
-        return result
+        # Extraction and indexing run in the background; poll /ingestion-jobs/{job_id} for progress
+        return await ingestion_jobs.submit(filename, subject, content_hash=content_hash)
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.exception("Error during PDF upload and vector insertion")
+        logger.exception("Error during PDF upload")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ingestion-jobs", response_model=List[IngestionJob])
+async def list_ingestion_jobs():
+    return ingestion_jobs.jobs()
+
+@router.get("/ingestion-jobs/{job_id}", response_model=IngestionJob)
+async def get_ingestion_job(job_id: str):
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job
+
+@router.get("/subjects")
+async def list_subjects():
+    """Indexed document count per subject partition"""
+    return await vector_partitions.sizes()
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from core.config import settings
+from core.executor import vector_executor
+from services.embedding_cache import get_embedding_cache
+from services.vector_partitions import vector_partitions
+from routers import ai_tutor, content
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def get_metrics():
+    return {
+        "vector_executor": vector_executor.stats(),
+        "embedding_cache": get_embedding_cache(settings.EMBEDDING_MODEL).stats(),
+        "query_batcher": vector_partitions.batcher.stats(),
+        "answer_cache": ai_tutor.answer_cache.stats(),
+        "llm_upstream": ai_tutor.llm.upstream.stats(),
+        "ingestion_jobs": content.ingestion_jobs.stats(),
+        "partitions": await vector_partitions.sizes(),
+    }
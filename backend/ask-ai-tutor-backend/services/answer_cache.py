@@ -0,0 +1,129 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from core.config import settings
+
+class SemanticAnswerCache:
+    """Reuse tutor answers for paraphrased questions, matched by query-embedding similarity"""
+
+    def __init__(
+        self,
+        similarity_threshold: Optional[float] = None,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.similarity_threshold = similarity_threshold if similarity_threshold is not None else settings.ANSWER_CACHE_SIMILARITY
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.ANSWER_CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else settings.ANSWER_CACHE_MAX_ENTRIES
+        # Insertion/recency order across all partitions, used for size-based eviction
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        # Creation order, used for TTL expiry; hits never reorder it
+        self._created: "OrderedDict[int, float]" = OrderedDict()
+        self._partitions: Dict[Tuple[str, str], List[int]] = {}
+        self._by_source: Dict[str, Set[int]] = {}
+        self._next_id = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, query_embedding, subject: str, difficulty: str) -> Optional[Dict]:
+        """Return the cached response of the most similar live entry above the threshold"""
+        self._expire()
+        entry_ids = self._partitions.get((subject, difficulty))
+        if not entry_ids:
+            self.misses += 1
+            return None
+
+        matrix = np.stack([self._entries[entry_id]["embedding"] for entry_id in entry_ids])
+        scores = matrix @ self._normalize(query_embedding)
+        best = int(np.argmax(scores))
+
+        if scores[best] < self.similarity_threshold:
+            self.misses += 1
+            return None
+
+        entry_id = entry_ids[best]
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        return self._entries[entry_id]["response"]
+
+    def store(self, query_embedding, subject: str, difficulty: str, source_ids: List[str], response: Dict):
+        entry_id = self._next_id
+        self._next_id += 1
+        created_at = time.monotonic()
+        self._entries[entry_id] = {
+            "embedding": self._normalize(query_embedding),
+            "partition": (subject, difficulty),
+            "source_ids": [source_id for source_id in source_ids if source_id is not None],
+            "response": response,
+            "created_at": created_at,
+        }
+        self._created[entry_id] = created_at
+        self._partitions.setdefault((subject, difficulty), []).append(entry_id)
+        for source_id in self._entries[entry_id]["source_ids"]:
+            self._by_source.setdefault(source_id, set()).add(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self.evictions += 1
+
+    def invalidate_sources(self, source_ids: Iterable[str]) -> int:
+        """Drop every entry whose answer was built from any of the given documents"""
+        stale = set()
+        for source_id in source_ids:
+            stale |= self._by_source.get(source_id, set())
+        for entry_id in stale:
+            self._remove(entry_id)
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        # Oldest first, so only the expired prefix is visited
+        while self._created:
+            entry_id, created_at = next(iter(self._created.items()))
+            if created_at >= cutoff:
+                break
+            self._remove(entry_id)
+            self.evictions += 1
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        del self._created[entry_id]
+        partition = self._partitions[entry["partition"]]
+        partition.remove(entry_id)
+        if not partition:
+            del self._partitions[entry["partition"]]
+        for source_id in entry["source_ids"]:
+            entries = self._by_source.get(source_id)
+            if entries is not None:
+                entries.discard(entry_id)
+                if not entries:
+                    del self._by_source[source_id]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "similarity_threshold": self.similarity_threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+# Shared by the tutor routes and the ingestion paths that invalidate it
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,86 @@
+import re
+from typing import Dict, List, Optional, Set
+from core.config import settings
+
+# Same token unit the PDF chunker uses for CHUNK_SIZE_TOKENS
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+WORD_PATTERN = re.compile(r"\w+")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+def count_tokens(text: str) -> int:
+    return len(TOKEN_PATTERN.findall(text))
+
+def _terms(text: str) -> Set[str]:
+    return set(WORD_PATTERN.findall(text.lower()))
+
+class ContextBudgeter:
+    """Pick, de-duplicate and trim retrieved passages so the prompt context fits a token budget"""
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        passage_tokens: Optional[int] = None,
+        duplicate_jaccard: Optional[float] = None,
+        min_passage_tokens: int = 30,
+    ):
+        self.token_budget = token_budget or settings.CONTEXT_TOKEN_BUDGET
+        self.passage_tokens = passage_tokens or settings.CONTEXT_PASSAGE_TOKENS
+        self.duplicate_jaccard = duplicate_jaccard or settings.CONTEXT_DUPLICATE_JACCARD
+        self.min_passage_tokens = min_passage_tokens
+
+    def assemble(self, query: str, context: List[Dict]) -> List[Dict]:
+        """Passages in descending score order, each trimmed, until the budget runs out"""
+        query_terms = _terms(query)
+        remaining = self.token_budget
+        kept, kept_terms = [], []
+
+        for ctx in sorted(context, key=lambda c: c.get("score", 0.0), reverse=True):
+            if remaining < self.min_passage_tokens:
+                break
+
+            terms = _terms(ctx["content"])
+            # Overlapping chunks of the same page would otherwise be sent twice
+            if any(self._jaccard(terms, other) >= self.duplicate_jaccard for other in kept_terms):
+                continue
+
+            text = self.trim(ctx["content"], query_terms, min(self.passage_tokens, remaining))
+            if not text:
+                continue
+            kept.append({**ctx, "content": text})
+            kept_terms.append(terms)
+            remaining -= count_tokens(text)
+
+        return kept
+
+    @staticmethod
+    def _jaccard(a: Set[str], b: Set[str]) -> float:
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def trim(self, text: str, query_terms: Set[str], max_tokens: int) -> str:
+        """Keep the sentences sharing the most terms with the query, in their original order"""
+        if count_tokens(text) <= max_tokens:
+            return text
+
+        sentences = [s for s in SENTENCE_SPLIT.split(text) if s.strip()]
+        ranked = sorted(
+            range(len(sentences)),
+            key=lambda i: (len(_terms(sentences[i]) & query_terms), -i),
+            reverse=True
+        )
+
+        chosen, used = [], 0
+        for i in ranked:
+            tokens = count_tokens(sentences[i])
+            if used + tokens > max_tokens:
+                continue
+            chosen.append(i)
+            used += tokens
+
+        if not chosen:
+            # A single sentence longer than the allowance: fall back to its leading tokens
+            best = sentences[ranked[0]]
+            ends = [match.end() for match in TOKEN_PATTERN.finditer(best)]
+            return best[:ends[max_tokens - 1]] if max_tokens > 0 else ""
+        return " ".join(sentences[i] for i in sorted(chosen))
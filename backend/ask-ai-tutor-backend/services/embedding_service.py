@@ -1,12 +1,33 @@
 from sentence_transformers import SentenceTransformer
+import numpy as np
 from core.config import settings
+from services.embedding_cache import get_embedding_cache
 
 class EmbeddingService:
     def __init__(self):
         self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
-    
+        self.cache = get_embedding_cache(settings.EMBEDDING_MODEL)
+
     def generate_embedding(self, text: str):
-        return self.model.encode(text)
-    
-    def batch_embed(self, texts: list):
-        return self.model.encode(texts)
\ No newline at end of file
+        return self.batch_embed([text])[0]
+
+    def batch_embed(self, texts: list, batch_size: int = None):
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        embeddings = self.cache.get_many(texts)
+        missing = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(self.cache.normalize(texts[i]), []).append(i)
+
+        if missing:
+            # Encode each distinct uncached text once, then fan the result back out
+            new_texts = list(missing)
+            encoded = self.model.encode(new_texts, batch_size=batch_size or settings.EMBEDDING_BATCH_SIZE)
+            self.cache.put_many(new_texts, encoded)
+            for text, embedding in zip(new_texts, encoded):
+                for i in missing[text]:
+                    embeddings[i] = np.asarray(embedding, dtype=np.float32)
+
+        return np.vstack(embeddings)
@@ -0,0 +1,99 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional
+from core.config import settings
+from core.models import IngestionJob
+from services.ingestion_service import IngestionService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IngestionJobQueue:
+    """In-process background queue for PDF ingestion with per-job progress"""
+
+    def __init__(self, ingestion_service: IngestionService, max_concurrent_jobs: Optional[int] = None, max_finished_jobs: int = 100):
+        self.ingestion_service = ingestion_service
+        # A small worker count keeps ingestion from crowding /ask off the shared vector executor
+        self.max_concurrent_jobs = max_concurrent_jobs or settings.INGEST_MAX_CONCURRENT_JOBS
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._content_hashes = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrent_jobs)]
+        logger.info(f"🧵 Ingestion queue started with {self.max_concurrent_jobs} worker(s)")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, pdf_filename: str, subject: str, content_hash: Optional[str] = None) -> IngestionJob:
+        await self.start()
+        job = IngestionJob(job_id=uuid.uuid4().hex, filename=pdf_filename, subject=subject, created_at=datetime.now())
+        self._jobs[job.job_id] = job
+        self._content_hashes[job.job_id] = content_hash
+        await self._queue.put(job.job_id)
+        logger.info(f"📥 Queued ingestion job {job.job_id} for {pdf_filename} ({subject})")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[IngestionJob]:
+        return list(self._jobs.values())
+
+    def stats(self) -> dict:
+        counts = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"max_concurrent_jobs": self.max_concurrent_jobs, "jobs": counts}
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(self._jobs[job_id])
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IngestionJob):
+        job.status = "running"
+        job.started_at = datetime.now()
+
+        def progress(counter: str, amount: int):
+            if counter == "skipped":
+                job.status = "skipped"
+            else:
+                setattr(job, counter, getattr(job, counter) + amount)
+
+        try:
+            job.result = await self.ingestion_service.ingest_pdf(
+                job.filename,
+                subject=job.subject,
+                content_hash=self._content_hashes.pop(job.job_id, None),
+                progress=progress,
+            )
+            if job.status == "running":
+                job.status = "completed"
+            logger.info(f"✅ Ingestion job {job.job_id} {job.status}")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.exception(f"Ingestion job {job.job_id} failed")
+        finally:
+            job.finished_at = datetime.now()
+            self._prune()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
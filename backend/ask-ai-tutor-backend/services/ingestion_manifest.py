@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Set
+from core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file in fixed-size chunks so large PDFs are never fully loaded"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class IngestionManifest:
+    """Persistent record of which source PDFs are indexed, and with what settings"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or os.path.join(settings.CHROMA_PERSIST_DIR, settings.INGESTION_MANIFEST_FILE))
+        self._lock = threading.Lock()
+
+    def fingerprint(self, content_hash: str, chunking: Dict, subject: str) -> Dict:
+        """Everything that changes what ends up in the index for the same PDF"""
+        return {
+            "content_hash": content_hash,
+            "subject": subject,
+            "embedding_model": settings.EMBEDDING_MODEL,
+            "chunking": chunking,
+        }
+
+    def get(self, source: str) -> Optional[Dict]:
+        return self._load().get(source)
+
+    def sources(self) -> Set[str]:
+        """Every recorded source filename"""
+        return set(self._load())
+
+    def subjects(self) -> Set[str]:
+        """Subjects of every recorded source"""
+        return {entry["summary"]["subject"] for entry in self._load().values() if "subject" in entry.get("summary", {})}
+
+    def is_current(self, source: str, fingerprint: Dict) -> bool:
+        entry = self.get(source)
+        return entry is not None and entry.get("fingerprint") == fingerprint
+
+    def record(self, source: str, fingerprint: Dict, summary: Dict):
+        # Re-read before writing: several services may share the same manifest file
+        with self._lock:
+            entries = self._load()
+            entries[source] = {"fingerprint": fingerprint, "summary": summary}
+            self._save(entries)
+        logger.info(f"📝 Manifest updated for {source}")
+
+    def forget(self, source: str):
+        with self._lock:
+            entries = self._load()
+            if entries.pop(source, None) is not None:
+                self._save(entries)
+        logger.info(f"📝 Manifest entry removed for {source}")
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ingestion manifest {self.path}: {e}")
+            return {}
+
+    def _save(self, entries: Dict[str, Dict]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, self.path)
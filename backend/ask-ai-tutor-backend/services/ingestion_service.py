@@ -0,0 +1,118 @@
+from typing import Callable, Dict, Iterable, Optional
+from core.models import PDFUpload
+from services.pdf_service import PDFProcessor
+from services.vector_partitions import VectorPartitions, vector_partitions
+from services.vector_service import VectorService, normalize_subject
+from services.ingestion_manifest import IngestionManifest, file_sha256
+from services.answer_cache import SemanticAnswerCache, answer_cache as shared_answer_cache
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IngestionService:
+    """Extract, embed and index source PDFs, skipping ones that are already up to date"""
+
+    def __init__(
+        self,
+        pdf_processor: Optional[PDFProcessor] = None,
+        partitions: Optional[VectorPartitions] = None,
+        manifest: Optional[IngestionManifest] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+    ):
+        self.pdf_processor = pdf_processor or PDFProcessor()
+        self.partitions = partitions or vector_partitions
+        self.manifest = manifest or IngestionManifest()
+        self.answer_cache = answer_cache or shared_answer_cache
+
+    def subject_of(self, pdf_filename: str) -> str:
+        """Subject a source was last ingested under, or the default for new sources"""
+        entry = self.manifest.get(pdf_filename)
+        return normalize_subject(entry["summary"].get("subject") if entry else None)
+
+    async def is_up_to_date(self, pdf_filename: str, fingerprint: dict, partition: VectorService) -> bool:
+        """The manifest matches and the partition still holds the source's documents"""
+        if not self.manifest.is_current(pdf_filename, fingerprint):
+            return False
+        return await partition.count_source(pdf_filename) > 0
+
+    async def ingest_pdf(
+        self,
+        pdf_filename: str,
+        subject: Optional[str] = None,
+        force: bool = False,
+        content_hash: Optional[str] = None,
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> PDFUpload:
+        """Ingest one PDF from the data dir into its subject partition; progress receives (counter name, increment) events"""
+        progress = progress or (lambda counter, amount: None)
+        subject = normalize_subject(subject)
+        partition = await self.partitions.get(subject)
+        pdf_path = self.pdf_processor.data_dir / pdf_filename
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"PDF file {pdf_filename} not found")
+
+        fingerprint = self.manifest.fingerprint(
+            content_hash or file_sha256(str(pdf_path)),
+            self.pdf_processor.chunking_settings(),
+            subject
+        )
+        if not force and await self.is_up_to_date(pdf_filename, fingerprint, partition):
+            logger.info(f"⏭️ {pdf_filename} unchanged since last ingestion, skipping")
+            progress("skipped", 1)
+            return PDFUpload(**self.manifest.get(pdf_filename)["summary"])
+
+        # Drop whatever an older version of this file left behind before re-indexing,
+        # including documents filed under a different subject last time
+        previous_subject = self.subject_of(pdf_filename)
+        if previous_subject != subject and self.partitions.has(previous_subject):
+            previous = await self.partitions.get(previous_subject)
+            await previous.delete_source(pdf_filename)
+        await partition.delete_source(pdf_filename)
+
+        # Extraction is CPU-bound; keep it off the event loop
+        result = await asyncio.to_thread(self.pdf_processor.process_and_save, pdf_filename, subject)
+        logger.info(f"PDF processed: {result}")
+        progress("pages_extracted", result.pages)
+
+        store = self.pdf_processor.store
+        if not store.exists(pdf_path.stem):
+            raise FileNotFoundError(f"Processed output not found for {pdf_filename}")
+
+        chunk_count = store.metadata(pdf_path.stem)["chunk_count"]
+        logger.info(f"Streaming {chunk_count} processed chunks from {store.records_path(pdf_path.stem)}")
+
+        # Chunks are read page by page as add_documents consumes them
+        documents = (
+            (chunk["text"], {
+                "source": pdf_filename,
+                "chapter": chunk["chapter"],
+                "page": chunk["page"],
+                "chunk": chunk["chunk"],
+                "subject": subject
+            })
+            for chunk in store.iter_chunks(pdf_path.stem)
+        )
+        progress("chunks_total", chunk_count)
+        doc_ids = await partition.add_documents(documents, progress=progress)
+        # Answers cached while the source was half re-indexed may cite its new passages
+        self.answer_cache.invalidate_sources(doc_ids)
+
+        self.manifest.record(pdf_filename, fingerprint, result.model_dump())
+        logger.info(f"✅ Added {len(doc_ids)} chunks from {pdf_filename} to {partition.collection_name}.")
+        return result
+
+    async def remove_source(self, pdf_filename: str) -> int:
+        """Drop a source's documents from its partition and its manifest entry"""
+        subject = self.subject_of(pdf_filename)
+        removed = 0
+        if self.partitions.has(subject):
+            partition = await self.partitions.get(subject)
+            removed = await partition.delete_source(pdf_filename)
+        self.manifest.forget(pdf_filename)
+        return removed
+
+    async def prune_missing(self, present: Iterable[str]) -> Dict[str, int]:
+        """Remove every recorded source that is not among the given filenames; returns documents removed per source"""
+        missing = sorted(self.manifest.sources() - set(present))
+        return {pdf_filename: await self.remove_source(pdf_filename) for pdf_filename in missing}
@@ -0,0 +1,133 @@
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keeps single-character tokens so equation symbols like "E" or "q" stay searchable
+TERM_PATTERN = re.compile(r"\w+")
+
+class BM25Index:
+    """Okapi BM25 inverted index over the same documents as a vector collection"""
+
+    def __init__(self, path: Path, k1: float = 1.5, b: float = 0.75):
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_fields: Dict[str, Dict] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        self._load()
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return TERM_PATTERN.findall(text.lower())
+
+    def count(self) -> int:
+        return len(self._doc_terms)
+
+    def upsert(self, ids: List[str], documents: List[str], fields: Optional[List[Dict]] = None, persist: bool = True):
+        """Index documents; fields are small per-document values that search can filter on"""
+        fields = fields or [{}] * len(ids)
+        with self._lock:
+            for doc_id, text, doc_fields in zip(ids, documents, fields):
+                self._remove(doc_id)
+                terms = Counter(self.tokenize(text))
+                self._doc_terms[doc_id] = dict(terms)
+                if doc_fields:
+                    self._doc_fields[doc_id] = doc_fields
+                self._doc_lengths[doc_id] = sum(terms.values())
+                self._total_length += self._doc_lengths[doc_id]
+                for term, tf in terms.items():
+                    self._postings.setdefault(term, {})[doc_id] = tf
+            if persist:
+                self._save()
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._doc_terms, self._doc_fields, self._doc_lengths, self._postings = {}, {}, {}, {}
+            self._total_length = 0
+
+    def _remove(self, doc_id: str):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._doc_fields.pop(doc_id, None)
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query: str, k: int, where: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """Best k (doc_id, BM25 score) pairs for the query, restricted to documents whose fields equal where"""
+        with self._lock:
+            n_docs = len(self._doc_terms)
+            if not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: Dict[str, float] = {}
+
+            for term in set(self.tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    if where and not self._has_fields(doc_id, where):
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def _has_fields(self, doc_id: str, where: Dict) -> bool:
+        doc_fields = self._doc_fields.get(doc_id, {})
+        return all(doc_fields.get(key) == value for key, value in where.items())
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            doc_terms, doc_fields = data["terms"], data["fields"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable BM25 index {self.path}: {e}")
+            return
+        self._doc_fields = doc_fields
+        for doc_id, terms in doc_terms.items():
+            self._doc_terms[doc_id] = terms
+            self._doc_lengths[doc_id] = sum(terms.values())
+            self._total_length += self._doc_lengths[doc_id]
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        # Only per-document term counts are stored; postings are rebuilt on load
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"terms": self._doc_terms, "fields": self._doc_fields}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
@@ -1,17 +1,49 @@
 import google.generativeai as genai
 from core.config import settings
-from typing import List, Dict
+from services.context_budget import ContextBudgeter, count_tokens
+from services.upstream import UpstreamClient
+from services.llm_stub import StubModel
+from typing import AsyncIterator, List, Dict
+import logging
 
-genai.configure(api_key=settings.GOOGLE_API_KEY)
+logger = logging.getLogger(__name__)
 
 class LLMService:
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        if settings.LLM_BACKEND == "stub":
+            # Offline model for load tests; responses are canned but shaped like Gemini's
+            self.model = StubModel(
+                latency_ms=settings.LLM_STUB_LATENCY_MS,
+                latency_sigma=settings.LLM_STUB_LATENCY_SIGMA,
+                error_rate=settings.LLM_STUB_ERROR_RATE,
+                seed=settings.LLM_STUB_SEED,
+            )
+            logger.info("🧪 Using stub LLM backend")
+        elif settings.LLM_BACKEND == "gemini":
+            if not settings.GOOGLE_API_KEY:
+                raise ValueError("GOOGLE_API_KEY is required when LLM_BACKEND is gemini")
+            genai.configure(api_key=settings.GOOGLE_API_KEY)
+            self.model = genai.GenerativeModel('gemini-2.5-flash')
+        else:
+            raise ValueError(f"Unknown LLM_BACKEND: {settings.LLM_BACKEND}")
+        self.budgeter = ContextBudgeter()
+        self.upstream = UpstreamClient(
+            rate_per_second=settings.LLM_RATE_PER_SECOND,
+            burst=settings.LLM_RATE_BURST,
+            initial_concurrency=settings.LLM_INITIAL_CONCURRENCY,
+            min_concurrency=settings.LLM_MIN_CONCURRENCY,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            latency_target=settings.LLM_LATENCY_TARGET_SECONDS,
+            max_retries=settings.LLM_MAX_RETRIES,
+            deadline=settings.LLM_DEADLINE_SECONDS,
+        )
     
-    async def generate_answer(self, query: str, context: List[Dict]) -> str:
+    def _build_prompt(self, query: str, context: List[Dict]) -> str:
+        # Retrieved passages are de-duplicated and trimmed to CONTEXT_TOKEN_BUDGET first
+        selected = self.budgeter.assemble(query, context)
         context_str = "\n".join(
             f"Source {i+1} (Page {ctx['page']}, Chapter {ctx['chapter']}):\n{ctx['content']}"
-            for i, ctx in enumerate(context)
+            for i, ctx in enumerate(selected)
         )
         
         prompt = f"""
@@ -29,10 +61,32 @@ ANSWER FORMAT:
 - Mention source pages
 - Keep it under 200 words
 """
+        logger.info(
+            f"🧮 Prompt for '{query[:60]}': ~{count_tokens(prompt)} tokens, "
+            f"{len(selected)}/{len(context)} passages, context ~{count_tokens(context_str)} tokens"
+        )
+        return prompt
 
-      
-        response = await self.model.generate_content_async(
+    async def generate_answer(self, query: str, context: List[Dict]) -> str:
+        prompt = self._build_prompt(query, context)
+        response = await self.upstream.call(lambda: self.model.generate_content_async(
             [{"role": "user", "parts": [prompt]}]
-        )
+        ))
 
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            logger.info(f"🧮 Gemini usage: {usage.prompt_token_count} prompt / {usage.candidates_token_count} output tokens")
         return response.text
+
+    async def stream_answer(self, query: str, context: List[Dict]) -> AsyncIterator[str]:
+        """Yield answer text as Gemini produces it"""
+        prompt = self._build_prompt(query, context)
+        # The concurrency slot is held until the last chunk, so streamed answers count against the limit
+        chunks = self.upstream.stream(lambda: self.model.generate_content_async(
+            [{"role": "user", "parts": [prompt]}],
+            stream=True
+        ))
+
+        async for chunk in chunks:
+            if chunk.parts:
+                yield chunk.text
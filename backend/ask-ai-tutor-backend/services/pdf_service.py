@@ -1,70 +1,189 @@
 import fitz  # PyMuPDF
-from typing import Dict, List
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
 import re
+import time
 from pathlib import Path
+from core.config import settings
 from core.models import PDFUpload
-import json
+from services.processed_store import ProcessedDocumentStore
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Roughly one entry per word or punctuation mark, close to the embedder's wordpiece count
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+CHAPTER_PATTERN = re.compile(r'(?:CHAPTER|Chapter|Unit)\s*[\d\.]+\s*[-:]?\s*(.+)', re.IGNORECASE)
+MIN_PAGES_PER_WORKER = 16
+
 class PDFProcessor:
-    def __init__(self, data_dir: str = "./data"):
+    def __init__(self, data_dir: str = "./data", chunk_size: Optional[int] = None, chunk_overlap: Optional[int] = None, extract_workers: Optional[int] = None):
         self.data_dir = Path(data_dir)
         self.processed_dir = self.data_dir / "processed"
         self.processed_dir.mkdir(parents=True, exist_ok=True)
+        self.store = ProcessedDocumentStore(self.processed_dir)
+        self.chunk_size = chunk_size or settings.CHUNK_SIZE_TOKENS
+        self.chunk_overlap = settings.CHUNK_OVERLAP_TOKENS if chunk_overlap is None else chunk_overlap
+        if not 0 <= self.chunk_overlap < self.chunk_size:
+            raise ValueError("Chunk overlap must be smaller than the chunk size")
+        self.extract_workers = extract_workers or settings.PDF_EXTRACT_WORKERS
+        self.last_extraction_stats: Dict = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_workers = 0
+        self._pool_lock = threading.Lock()
+
+    def _extract_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Long-lived worker pool, so spawned interpreters pay their imports once per process rather than per PDF"""
+        with self._pool_lock:
+            if self._pool is None or self._pool_workers < workers:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                # Spawned, not forked: extraction runs on a worker thread of a process that already holds torch and thread pools
+                self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+                self._pool_workers = workers
+            return self._pool
+
+    def shutdown(self):
+        """Stop the extraction worker processes"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+                self._pool_workers = 0
     
-    def extract_chapters(self, pdf_path: str) -> Dict[str, Dict[int, str]]:
-        """Extract text by chapter and page with improved parsing"""
-        doc = fitz.open(pdf_path)
+    def extract_chapters(self, pdf_path: str, workers: Optional[int] = None) -> Dict[str, Dict[int, str]]:
+        """Extract text by chapter and page, splitting the page range across worker processes"""
+        workers = workers or self.extract_workers
+        started = time.perf_counter()
+
+        with fitz.open(pdf_path) as doc:
+            page_count = len(doc)
+
+        # Small documents are not worth the task hand-off to worker processes
+        workers = max(1, min(workers, page_count // MIN_PAGES_PER_WORKER))
+        if workers == 1:
+            pages = _extract_page_range(pdf_path, 0, page_count)
+        else:
+            step = -(-page_count // workers)
+            ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+            pool = self._extract_pool(workers)
+            try:
+                futures = [pool.submit(_extract_page_range, pdf_path, start, stop) for start, stop in ranges]
+                pages = [page for future in futures for page in future.result()]
+            except BrokenProcessPool:
+                # A crashed worker poisons the pool; the next extraction starts a fresh one
+                with self._pool_lock:
+                    if self._pool is pool:
+                        self._pool = None
+                        self._pool_workers = 0
+                raise
+
+        # Chapters are assigned after merging so a heading carries over split boundaries
         chapters = {}
         current_chapter = "Introduction"
-        
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            text = page.get_text("text")
-            
-            
-            chapter_match = re.search(r'(?:CHAPTER|Chapter|Unit)\s*[\d\.]+\s*[-:]?\s*(.+)', text, re.IGNORECASE)
-            if chapter_match:
-                current_chapter = chapter_match.group(1).strip()
+        for page_num, heading, clean_text in pages:
+            if heading:
+                current_chapter = heading
                 logger.info(f"Found chapter: {current_chapter}")
-            
+
             if current_chapter not in chapters:
                 chapters[current_chapter] = {}
-            
-          
-            clean_text = self._clean_page_text(text)
+
             chapters[current_chapter][page_num + 1] = clean_text
-        
+
+        elapsed = time.perf_counter() - started
+        self.last_extraction_stats = {
+            "pages": page_count,
+            "workers": workers,
+            "seconds": round(elapsed, 3),
+            "pages_per_sec": round(page_count / elapsed, 2) if elapsed else 0.0,
+        }
+        logger.info(
+            f"Extracted {page_count} pages with {workers} worker(s) in {elapsed:.2f}s "
+            f"({self.last_extraction_stats['pages_per_sec']} pages/sec)"
+        )
         return chapters
     
-    def _clean_page_text(self, text: str) -> str:
+    @staticmethod
+    def _clean_page_text(text: str) -> str:
         """Remove headers, footers, and excessive whitespace"""
         lines = [line.strip() for line in text.split('\n') if line.strip()]
         return '\n'.join(lines)
     
-    def process_and_save(self, pdf_filename: str) -> PDFUpload:
-        """Process PDF and save chunks as JSON"""
+    def chunking_settings(self) -> Dict:
+        return {"strategy": "tokens", "chunk_size": self.chunk_size, "chunk_overlap": self.chunk_overlap}
+
+    def chunk_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Character spans of overlapping windows of at most chunk_size tokens"""
+        spans = [match.span() for match in TOKEN_PATTERN.finditer(text)]
+        if not spans:
+            return []
+
+        chunk_spans = []
+        step = self.chunk_size - self.chunk_overlap
+        for start in range(0, len(spans), step):
+            window = spans[start:start + self.chunk_size]
+            # Span the original text so line breaks and spacing survive
+            chunk_spans.append((window[0][0], window[-1][1]))
+            if start + self.chunk_size >= len(spans):
+                break
+        return chunk_spans
+
+    def chunk_text(self, text: str) -> List[str]:
+        """Split text into overlapping windows of at most chunk_size tokens"""
+        return [text[start:end] for start, end in self.chunk_spans(text)]
+
+    def chunk_chapters(self, chapters: Dict[str, Dict[int, str]]) -> List[Dict]:
+        """Chunk every page, keeping chapter and page provenance; chunks never span pages"""
+        chunks = []
+        for chapter, pages in chapters.items():
+            for page_num, text in pages.items():
+                for chunk_index, (start, end) in enumerate(self.chunk_spans(text)):
+                    chunks.append({
+                        "chapter": chapter,
+                        "page": page_num,
+                        "chunk": chunk_index,
+                        "start": start,
+                        "end": end,
+                        "text": text[start:end]
+                    })
+        return chunks
+
+    def process_and_save(self, pdf_filename: str, subject: Optional[str] = None) -> PDFUpload:
+        """Process PDF and save pages and chunks to the processed store"""
         pdf_path = self.data_dir / pdf_filename
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF file {pdf_filename} not found")
         
         chapters = self.extract_chapters(str(pdf_path))
+        chunks = self.chunk_chapters(chapters)
         output_data = {
             "filename": pdf_filename,
-            "subject": "physics",
+            "subject": subject or settings.DEFAULT_SUBJECT,
             "chapters": list(chapters.keys()),
             "pages": sum(len(pages) for pages in chapters.values())
         }
         
+        self.store.write(
+            pdf_path.stem,
+            {**output_data, "chunking": self.chunking_settings(), "chunk_count": len(chunks)},
+            chapters,
+            chunks
+        )
         
-        output_file = self.processed_dir / f"{pdf_path.stem}.json"
-        with open(output_file, "w") as f:
-            json.dump({
-                "metadata": output_data,
-                "chapters": chapters
-            }, f, indent=2)
-        
-        logger.info(f"Processed PDF saved to {output_file}")
-        return PDFUpload(**output_data)
\ No newline at end of file
+        logger.info(f"Processed PDF saved to {self.store.records_path(pdf_path.stem)} ({len(chunks)} chunks)")
+        return PDFUpload(**output_data)
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> List[Tuple[int, Optional[str], str]]:
+    """Extract pages [start, stop) as (index, heading, text); each worker opens its own document"""
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        for page_num in range(start, stop):
+            text = doc.load_page(page_num).get_text("text")
+            chapter_match = CHAPTER_PATTERN.search(text)
+            heading = chapter_match.group(1).strip() if chapter_match else None
+            pages.append((page_num, heading, PDFProcessor._clean_page_text(text)))
+    return pages
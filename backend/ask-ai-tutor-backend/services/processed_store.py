@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# <stem>.jsonl holds one {"chapter", "page", "text", "chunks"} record per line, where
+# chunks are character spans into the page text rather than copies of it;
+# <stem>.idx.json holds the book metadata and {chapter: {page: [offset, length]}} for every record.
+class ProcessedDocumentStore:
+    """Processed books stored for page-by-page streaming and (chapter, page) lookups"""
+
+    def __init__(self, processed_dir: Path):
+        self.processed_dir = Path(processed_dir)
+        self.processed_dir.mkdir(parents=True, exist_ok=True)
+        # Parsed indexes keyed by stem, tagged with the file's (mtime, size) so a rewrite is picked up
+        self._indexes: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+        self._lock = threading.Lock()
+
+    def records_path(self, stem: str) -> Path:
+        return self.processed_dir / f"{stem}.jsonl"
+
+    def index_path(self, stem: str) -> Path:
+        return self.processed_dir / f"{stem}.idx.json"
+
+    def exists(self, stem: str) -> bool:
+        return self.records_path(stem).exists() and self.index_path(stem).exists()
+
+    def write(self, stem: str, metadata: Dict, chapters: Dict[str, Dict[int, str]], chunks: List[Dict]):
+        chunks_by_page: Dict[int, List[Dict]] = {}
+        for chunk in chunks:
+            chunks_by_page.setdefault(chunk["page"], []).append([chunk["chunk"], chunk["start"], chunk["end"]])
+
+        offsets: Dict[str, Dict[str, List[int]]] = {}
+        page_count = 0
+        records_path = self.records_path(stem)
+        tmp_records = records_path.with_suffix(".jsonl.tmp")
+        with open(tmp_records, "wb") as f:
+            for chapter, pages in chapters.items():
+                for page_num, text in pages.items():
+                    line = json.dumps(
+                        {"chapter": chapter, "page": page_num, "text": text, "chunks": chunks_by_page.get(page_num, [])},
+                        ensure_ascii=False,
+                        separators=(",", ":")
+                    ).encode("utf-8") + b"\n"
+                    # JSON object keys are strings, so pages are keyed by str(page_num)
+                    offsets.setdefault(chapter, {})[str(page_num)] = [f.tell(), len(line)]
+                    page_count += 1
+                    f.write(line)
+
+        index_path = self.index_path(stem)
+        tmp_index = index_path.with_suffix(".json.tmp")
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump({"metadata": metadata, "offsets": offsets}, f, ensure_ascii=False, separators=(",", ":"))
+
+        # Records first, then the index that points into them
+        os.replace(tmp_records, records_path)
+        os.replace(tmp_index, index_path)
+        with self._lock:
+            self._indexes.pop(stem, None)
+        logger.info(f"Processed store written: {records_path} ({page_count} pages)")
+
+    def _load_index(self, stem: str) -> Dict:
+        index_path = self.index_path(stem)
+        try:
+            stat = index_path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Processed index not found: {index_path}")
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._indexes.get(stem)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if "offsets" not in index:
+            # Older indexes list [chapter, page, offset, length] entries
+            offsets: Dict[str, Dict[str, List[int]]] = {}
+            for chapter, page, offset, length in index.pop("pages", []):
+                offsets.setdefault(chapter, {})[str(page)] = [offset, length]
+            index["offsets"] = offsets
+
+        with self._lock:
+            self._indexes[stem] = (version, index)
+        return index
+
+    def metadata(self, stem: str) -> Dict:
+        return self._load_index(stem)["metadata"]
+
+    def iter_pages(self, stem: str) -> Iterator[Dict]:
+        """Stream page records in book order without loading the whole book"""
+        with open(self.records_path(stem), "rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def iter_chunks(self, stem: str) -> Iterator[Dict]:
+        for record in self.iter_pages(stem):
+            for chunk_index, start, end in record["chunks"]:
+                yield {
+                    "chapter": record["chapter"],
+                    "page": record["page"],
+                    "chunk": chunk_index,
+                    "text": record["text"][start:end]
+                }
+
+    def read_page(self, stem: str, chapter: str, page: int) -> Optional[Dict]:
+        """Random access to one page record via the cached offset index"""
+        entry = self._load_index(stem)["offsets"].get(chapter, {}).get(str(page))
+        if entry is None:
+            return None
+        offset, length = entry
+        with open(self.records_path(stem), "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
@@ -0,0 +1,234 @@
+import asyncio
+import random
+import time
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+THROTTLE_ERRORS = {"ResourceExhausted", "TooManyRequests", "RateLimitError"}
+TRANSIENT_ERRORS = {"ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "APIConnectionError", "APITimeoutError"}
+
+class UpstreamUnavailable(Exception):
+    """The upstream model could not answer within the request deadline"""
+
+def _status_code(error: Exception) -> Optional[int]:
+    for attr in ("code", "status_code", "http_status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+def is_throttle(error: Exception) -> bool:
+    return type(error).__name__ in THROTTLE_ERRORS or _status_code(error) == 429
+
+def is_retryable(error: Exception) -> bool:
+    return (
+        is_throttle(error)
+        or type(error).__name__ in TRANSIENT_ERRORS
+        or isinstance(error, (asyncio.TimeoutError, ConnectionError))
+        or _status_code(error) in RETRYABLE_STATUS
+    )
+
+class TokenBucket:
+    """Refills rate tokens per second up to burst; each upstream attempt takes one"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Wait for a token and return how long that took"""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+class AdaptiveLimiter:
+    """Concurrency limit that grows additively while calls are fast and shrinks multiplicatively on slowness or 429s"""
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, latency_target: float):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency: Optional[float], throttled: bool, timed_out: bool = False):
+        async with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.min_limit, self.limit * 0.5)
+            elif timed_out or (latency is not None and latency > self.latency_target):
+                self.limit = max(self.min_limit, self.limit * 0.9)
+            elif latency is not None:
+                # Roughly +1 per full window of successful calls
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+class UpstreamClient:
+    """Rate limiting, adaptive concurrency and jittered retries around calls to a model API"""
+
+    def __init__(
+        self,
+        rate_per_second: float = 10,
+        burst: int = 20,
+        initial_concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_concurrency: int = 32,
+        latency_target: float = 8.0,
+        max_retries: int = 4,
+        base_backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        deadline: float = 30.0,
+    ):
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.limiter = AdaptiveLimiter(initial_concurrency, min_concurrency, max_concurrency, latency_target)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.throttles = 0
+        self.timeouts = 0
+        self.rate_limited = 0
+        self.deadline_exceeded = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    async def call(self, fn: Callable[[], Awaitable[T]], deadline: Optional[float] = None) -> T:
+        """Run fn, retrying transient failures with backoff until the deadline (seconds from now) passes"""
+        return await self._retrying(lambda expires: self._attempt(fn, expires), deadline)
+
+    async def stream(self, fn: Callable[[], Awaitable[AsyncIterable[T]]], deadline: Optional[float] = None) -> AsyncIterator[T]:
+        """Open a stream with call()'s retries, holding the concurrency slot until it is consumed or abandoned"""
+        # Only opening is retried; once chunks have been yielded a failure ends the stream
+        stream, started = await self._retrying(lambda expires: self._open(fn, expires), deadline)
+        error = None
+        try:
+            async for chunk in stream:
+                yield chunk
+        except BaseException as e:
+            error = e
+            if isinstance(e, Exception):
+                self.failures += 1
+            raise
+        finally:
+            await self._release(started, error)
+
+    async def _retrying(self, attempt: Callable[[float], Awaitable[T]], deadline: Optional[float]) -> T:
+        self.calls += 1
+        expires = time.monotonic() + (deadline or self.deadline)
+        retries = 0
+
+        while True:
+            try:
+                return await attempt(expires)
+            except UpstreamUnavailable:
+                self.failures += 1
+                raise
+            except Exception as e:
+                if not is_retryable(e) or retries >= self.max_retries:
+                    self.failures += 1
+                    if is_retryable(e):
+                        raise UpstreamUnavailable(f"Upstream failed after {retries + 1} attempts: {type(e).__name__} {e}") from e
+                    raise
+
+                # Full jitter keeps a burst of throttled callers from retrying in lockstep
+                backoff = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** retries))
+                if time.monotonic() + backoff >= expires:
+                    self.failures += 1
+                    self.deadline_exceeded += 1
+                    raise UpstreamUnavailable(f"Upstream deadline exceeded: {type(e).__name__} {e}") from e
+                retries += 1
+                self.retries += 1
+                await asyncio.sleep(backoff)
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]], expires: float) -> T:
+        started = await self._acquire(expires)
+        try:
+            result = await asyncio.wait_for(fn(), timeout=max(0.0, expires - started))
+        except BaseException as e:
+            await self._release(started, e)
+            raise
+        await self._release(started, None)
+        return result
+
+    async def _open(self, fn: Callable[[], Awaitable[AsyncIterable[T]]], expires: float) -> Tuple[AsyncIterable[T], float]:
+        # On success the slot stays taken; stream() releases it when iteration ends
+        started = await self._acquire(expires)
+        try:
+            stream = await asyncio.wait_for(fn(), timeout=max(0.0, expires - started))
+        except BaseException as e:
+            await self._release(started, e)
+            raise
+        return stream, started
+
+    async def _acquire(self, expires: float) -> float:
+        """Wait for a rate token and a concurrency slot; returns when the attempt started"""
+        queued_at = time.monotonic()
+        try:
+            bucket_wait = await asyncio.wait_for(self.bucket.acquire(), timeout=max(0.0, expires - queued_at))
+            if bucket_wait > 0:
+                self.rate_limited += 1
+            await asyncio.wait_for(self.limiter.acquire(), timeout=max(0.0, expires - time.monotonic()))
+        except asyncio.TimeoutError:
+            self.deadline_exceeded += 1
+            raise UpstreamUnavailable("Timed out waiting for upstream capacity")
+
+        started = time.monotonic()
+        wait = started - queued_at
+        self.queue_wait_total += wait
+        self.queue_wait_max = max(self.queue_wait_max, wait)
+        return started
+
+    async def _release(self, started: float, error: Optional[BaseException]):
+        latency, throttled, timed_out = None, False, False
+        if error is None:
+            latency = time.monotonic() - started
+        elif isinstance(error, asyncio.TimeoutError):
+            # Running out of time is the slowest outcome, so it must shrink the limit too
+            timed_out = True
+            self.timeouts += 1
+        elif isinstance(error, Exception):
+            throttled = is_throttle(error)
+            if throttled:
+                self.throttles += 1
+        # Cancellation and abandoned streams say nothing about upstream health
+        await self.limiter.release(latency, throttled, timed_out)
+
+    def stats(self) -> dict:
+        attempts = self.calls + self.retries
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "throttles": self.throttles,
+            "timeouts": self.timeouts,
+            "rate_limited": self.rate_limited,
+            "deadline_exceeded": self.deadline_exceeded,
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "avg_queue_wait_ms": round(self.queue_wait_total / attempts * 1000, 2) if attempts else 0.0,
+            "max_queue_wait_ms": round(self.queue_wait_max * 1000, 2),
+        }
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from typing import Dict, Iterable, List, Optional
+from core.config import settings
+from core.executor import vector_executor
+from services.embedding_service import EmbeddingService
+from services.embedding_batcher import EmbeddingBatcher
+from services.ingestion_manifest import IngestionManifest
+from services.vector_service import VectorService, normalize_subject
+import logging
+
+logger = logging.getLogger(__name__)
+
+class VectorPartitions:
+    """Per-subject VectorServices sharing one embedding model and query batcher"""
+
+    def __init__(self, known_subjects: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self._partitions: Dict[str, VectorService] = {}
+        self._known = {normalize_subject(settings.DEFAULT_SUBJECT)}
+        self._known.update(normalize_subject(subject) for subject in known_subjects)
+        self._embedder: Optional[EmbeddingService] = None
+        self._batcher: Optional[EmbeddingBatcher] = None
+        self._opening: Dict[str, asyncio.Lock] = {}
+
+    @property
+    def embedder(self) -> EmbeddingService:
+        with self._lock:
+            if self._embedder is None:
+                self._embedder = EmbeddingService()
+            return self._embedder
+
+    @property
+    def batcher(self) -> EmbeddingBatcher:
+        embedder = self.embedder
+        with self._lock:
+            if self._batcher is None:
+                self._batcher = EmbeddingBatcher(embedder)
+            return self._batcher
+
+    def subjects(self) -> List[str]:
+        return sorted(self._known)
+
+    def has(self, subject: str) -> bool:
+        return normalize_subject(subject) in self._known
+
+    async def get(self, subject: Optional[str] = None) -> VectorService:
+        """Partition for the subject; the first use opens it on a worker thread so the event loop keeps serving"""
+        subject = normalize_subject(subject)
+        partition = self._partitions.get(subject)
+        if partition is not None:
+            return partition
+
+        # Concurrent first requests for one subject wait for a single open instead of each starting one
+        async with self._opening.setdefault(subject, asyncio.Lock()):
+            partition = self._partitions.get(subject)
+            if partition is None:
+                partition = await asyncio.to_thread(self.open, subject)
+            return partition
+
+    def open(self, subject: Optional[str] = None) -> VectorService:
+        """Blocking open: connects the vector store and rebuilds the BM25 index if needed"""
+        subject = normalize_subject(subject)
+        embedder, batcher = self.embedder, self.batcher
+        with self._lock:
+            if subject not in self._partitions:
+                self._partitions[subject] = VectorService(subject, embedder=embedder, batcher=batcher)
+                self._known.add(subject)
+                logger.info(f"🗂️ Opened partition {subject}")
+            return self._partitions[subject]
+
+    def flush(self):
+        """Persist buffered index writes of every open partition"""
+        with self._lock:
+            partitions = list(self._partitions.values())
+        for partition in partitions:
+            partition.flush()
+
+    async def embed_query(self, query: str):
+        batcher = self._batcher
+        if batcher is None:
+            # Loading the embedding model takes seconds; keep it off the event loop
+            batcher = await asyncio.to_thread(lambda: self.batcher)
+        return await batcher.embed(query)
+
+    async def sizes(self) -> Dict[str, int]:
+        """Document count of every known subject partition"""
+        sizes = {}
+        for subject in self.subjects():
+            partition = await self.get(subject)
+            sizes[subject] = await vector_executor.run(partition.backend.count)
+        return sizes
+
+# Shared by the routers and the startup ingestion so every caller sees the same in-process indexes
+vector_partitions = VectorPartitions(IngestionManifest().subjects())
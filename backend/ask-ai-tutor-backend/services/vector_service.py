@@ -1,92 +1,257 @@
-import chromadb
-from chromadb.config import Settings
-from typing import List, Dict, Optional
+import hashlib
+import re
+from pathlib import Path
+from typing import Callable, Iterable, List, Dict, Optional, Tuple
 from core.config import settings
+from core.executor import vector_executor
 from services.embedding_service import EmbeddingService
+from services.embedding_batcher import EmbeddingBatcher
+from services.lexical_index import BM25Index
+from services.answer_cache import answer_cache
+from services.vector_backends import create_vector_backend
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
+SUBJECT_PATTERN = re.compile(r"^[a-z0-9_]{1,48}$")
+
+def normalize_subject(subject: Optional[str]) -> str:
+    """Lower-cased subject name, safe to embed in collection and file names"""
+    subject = (subject or settings.DEFAULT_SUBJECT).strip().lower().replace(" ", "_")
+    if not SUBJECT_PATTERN.match(subject):
+        raise ValueError(f"Invalid subject: {subject!r}")
+    return subject
+
 class VectorService:
-    def __init__(self):
+    """One subject partition: a vector collection plus its BM25 index"""
+
+    def __init__(
+        self,
+        subject: Optional[str] = None,
+        embedder: Optional[EmbeddingService] = None,
+        batcher: Optional[EmbeddingBatcher] = None,
+    ):
         logger.info("⚙️ Initializing VectorService...")
         
-        self.client = chromadb.PersistentClient(
-            path=settings.CHROMA_PERSIST_DIR,
-            settings=Settings(anonymized_telemetry=False)
-        )
-        
-        logger.info("✅ ChromaDB PersistentClient initialized.")
+        self.subject = normalize_subject(subject)
+        self.collection_name = f"ncert_{self.subject}"
+        self.backend = create_vector_backend(self.collection_name)
         
-        self.collection = self.client.get_or_create_collection(
-            name="ncert_physics",
-            metadata={"hnsw:space": "cosine"}
-        )
-        
-        logger.info(f"📚 Vector DB collection loaded: {self.collection.name}")
-        self.embedder = EmbeddingService()
+        logger.info(f"📚 Vector DB collection loaded: {self.collection_name} ({self.backend.name} backend)")
+        self.embedder = embedder or EmbeddingService()
+        self.batcher = batcher or EmbeddingBatcher(self.embedder)
+        self.lexical_index = BM25Index(Path(settings.LEXICAL_INDEX_DIR) / f"{self.collection_name}.bm25.json")
         self._ensure_collection_ready()
+        self._sync_lexical_index()
 
     def _ensure_collection_ready(self):
         """Verify the collection is ready for operations"""
         try:
             # Try a simple count operation to verify connection
-            self.collection.count()
+            self.backend.count()
             logger.info("🔍 Vector DB connection verified")
         except Exception as e:
             logger.error(f"Failed to verify vector DB connection: {e}")
             raise
 
+    def _sync_lexical_index(self):
+        """Rebuild the BM25 index from the vector store if the two have drifted apart"""
+        stored = self.backend.count()
+        if self.lexical_index.count() == stored:
+            return
+        logger.info(f"🔤 Rebuilding BM25 index for {self.collection_name} from {stored} stored documents")
+        records = self.backend.get()
+        self.lexical_index.clear()
+        self.lexical_index.upsert(
+            [r["id"] for r in records],
+            [r["document"] for r in records],
+            [self._lexical_fields(r["metadata"]) for r in records]
+        )
+
+    @staticmethod
+    def _lexical_fields(metadata: dict) -> dict:
+        # Only the metadata that search can filter on is mirrored into the BM25 index
+        return {"chapter": metadata.get("chapter")}
+
+    @staticmethod
+    def _make_doc_id(text: str, metadata: dict) -> str:
+        """Content-addressed ID, stable across processes so re-ingestion upserts in place"""
+        key = "\x1f".join([
+            str(metadata.get("source", "")),
+            str(metadata.get("page", "")),
+            str(metadata.get("chunk", "")),
+            text,
+        ])
+        return f"doc_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}"
+
     async def add_document(self, text: str, metadata: dict) -> str:
         """Add a document to the vector DB with improved error handling"""
         if not text.strip():
             raise ValueError("Cannot add empty document")
             
+        doc_ids = await self._store_batch([(text, metadata)])
+        await vector_executor.run(self.flush)
+        return doc_ids[0]
+
+    async def add_documents(
+        self,
+        documents: Iterable[Tuple[str, dict]],
+        batch_size: Optional[int] = None,
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> List[str]:
+        """Add (text, metadata) pairs in mini-batches: one encode and one upsert per batch"""
+        # progress, if given, is called with ("chunks_embedded" | "chunks_indexed", batch size)
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        doc_ids = []
+        batch = []
+
+        for text, metadata in documents:
+            if not text.strip():
+                logger.warning(f"Skipping empty document: {metadata}")
+                continue
+            batch.append((text, metadata))
+            if len(batch) >= batch_size:
+                doc_ids.extend(await self._store_batch(batch, progress))
+                batch = []
+
+        if batch:
+            doc_ids.extend(await self._store_batch(batch, progress))
+
+        # Index files are rewritten once per call rather than once per batch
+        await vector_executor.run(self.flush)
+        return doc_ids
+
+    def flush(self):
+        """Persist buffered writes: the BM25 file and, for the flat backend, the vector matrix"""
+        self.lexical_index.save()
+        self.backend.flush()
+
+    async def _store_batch(self, batch: List[Tuple[str, dict]], progress: Optional[Callable[[str, int], None]] = None) -> List[str]:
+        # Embedding and upsert are separate executor tasks so interactive searches can slot in between
         try:
-            embedding = self.embedder.generate_embedding(text).tolist()
-            doc_id = f"doc_{hash(text) & 0xFFFFFFFF}" 
-            
-            self.collection.add(
-                documents=[text],
-                embeddings=[embedding],
-                metadatas=[metadata],
-                ids=[doc_id]
-            )
-            
-            logger.debug(f"✅ Added document: {doc_id}")
-            return doc_id
+            embeddings = await vector_executor.run(self._embed_batch, batch)
+            if progress:
+                progress("chunks_embedded", len(batch))
+
+            doc_ids = await vector_executor.run(self._upsert_batch, batch, embeddings)
+            if progress:
+                progress("chunks_indexed", len(batch))
+
+            logger.debug(f"✅ Added batch of {len(doc_ids)} documents")
+            return doc_ids
         except Exception as e:
-            logger.error(f"Failed to add document: {e}")
+            logger.error(f"Failed to add batch of {len(batch)} documents: {e}")
             raise
 
-    async def search(self, query: str, n_results: int = 3) -> List[Dict]:
-        """Search with improved error handling and logging"""
+    def _embed_batch(self, batch: List[Tuple[str, dict]]) -> List[List[float]]:
+        texts = [text for text, _ in batch]
+        return self.embedder.batch_embed(texts, batch_size=len(texts)).tolist()
+
+    def _upsert_batch(self, batch: List[Tuple[str, dict]], embeddings: List[List[float]]) -> List[str]:
+        doc_ids = [self._make_doc_id(text, metadata) for text, metadata in batch]
+        documents = [text for text, _ in batch]
+        metadatas = [metadata for _, metadata in batch]
+        self.backend.upsert(
+            ids=doc_ids,
+            embeddings=embeddings,
+            documents=documents,
+            metadatas=metadatas
+        )
+        self.lexical_index.upsert(doc_ids, documents, [self._lexical_fields(meta) for meta in metadatas], persist=False)
+        return doc_ids
+
+    async def count_source(self, source: str) -> int:
+        """Number of indexed documents that came from the given source file"""
+        return await vector_executor.run(self.backend.count, where={"source": source})
+
+    async def delete_source(self, source: str) -> int:
+        """Remove every document that came from the given source file"""
+        removed = await self.count_source(source)
+        if removed:
+            stale = await vector_executor.run(self.backend.get, where={"source": source})
+            await vector_executor.run(self.backend.delete, where={"source": source})
+            await vector_executor.run(self.backend.flush)
+            stale_ids = [record["id"] for record in stale]
+            await vector_executor.run(self.lexical_index.delete, stale_ids)
+            # Cached answers citing the removed passages would outlive them until their TTL
+            answer_cache.invalidate_sources(stale_ids)
+            logger.info(f"🗑️ Removed {removed} stale documents for {source}")
+        return removed
+
+    async def count(self) -> int:
+        return await vector_executor.run(self.backend.count)
+
+    async def embed_query(self, query: str):
+        """Concurrent queries share one encoder forward pass via the micro-batcher"""
+        return await self.batcher.embed(query)
+
+    def _fuse(self, query_embedding: np.ndarray, vector_matches: List[Dict], lexical_matches: List[Tuple[str, float]], n_results: int) -> List[Dict]:
+        """Weighted reciprocal-rank fusion of the vector and BM25 rankings"""
+        rrf_k = settings.HYBRID_RRF_K
+        matches = {match["id"]: match for match in vector_matches}
+        fused = {
+            match["id"]: settings.HYBRID_VECTOR_WEIGHT / (rrf_k + rank)
+            for rank, match in enumerate(vector_matches, start=1)
+        }
+        lexical_scores = dict(lexical_matches)
+        for rank, (doc_id, _) in enumerate(lexical_matches, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + settings.HYBRID_LEXICAL_WEIGHT / (rrf_k + rank)
+
+        top_ids = sorted(fused, key=fused.get, reverse=True)[:n_results]
+
+        # Lexical-only hits still report cosine similarity, so "score" means the same thing for every result
+        missing = [doc_id for doc_id in top_ids if doc_id not in matches]
+        if missing:
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            query_vector = query_vector / (np.linalg.norm(query_vector) or 1.0)
+            for record in self.backend.get(ids=missing, include_embeddings=True):
+                vector = np.asarray(record.pop("embedding"), dtype=np.float32)
+                record["score"] = float(vector @ query_vector / (np.linalg.norm(vector) or 1.0))
+                matches[record["id"]] = record
+
+        results = []
+        for doc_id in top_ids:
+            if doc_id in matches:
+                match = dict(matches[doc_id])
+                match["fused_score"] = fused[doc_id]
+                match["lexical_score"] = lexical_scores.get(doc_id, 0.0)
+                results.append(match)
+        return results
+
+    async def search(self, query: str, n_results: int = 3, query_embedding=None, chapter: Optional[str] = None) -> List[Dict]:
+        """Hybrid search: vector and BM25 candidates fused into one ranking, optionally within one chapter"""
         if not query.strip():
             return []
             
         try:
-            query_embedding = self.embedder.generate_embedding(query).tolist()
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                include=["documents", "metadatas", "distances"]
-            )
+            if query_embedding is None:
+                query_embedding = await self.embed_query(query)
+            where = {"chapter": chapter} if chapter else None
+
+            if settings.HYBRID_LEXICAL_WEIGHT > 0:
+                candidates = max(n_results, settings.HYBRID_CANDIDATES)
+                vector_matches = await vector_executor.run(self.backend.query, query_embedding.tolist(), candidates, where)
+                lexical_matches = await vector_executor.run(self.lexical_index.search, query, candidates, where)
+                matches = await vector_executor.run(self._fuse, query_embedding, vector_matches, lexical_matches, n_results)
+            else:
+                matches = await vector_executor.run(self.backend.query, query_embedding.tolist(), n_results, where)
             
             response = []
-            for doc, meta, dist in zip(
-                results["documents"][0],
-                results["metadatas"][0],
-                results["distances"][0]
-            ):
+            for match in matches:
+                meta = match["metadata"]
                 response.append({
-                    "content": doc,
-                    "metadata": meta or {},
-                    "score": 1 - dist,
-                    "page": meta.get("page", "N/A") if meta else "N/A",
-                    "chapter": meta.get("chapter", "N/A") if meta else "N/A"
+                    "id": match["id"],
+                    "content": match["document"],
+                    "metadata": meta,
+                    "score": match["score"],
+                    "fused_score": match.get("fused_score"),
+                    "lexical_score": match.get("lexical_score"),
+                    "page": meta.get("page", "N/A"),
+                    "chapter": meta.get("chapter", "N/A")
                 })
             
-            logger.info(f"🔍 Found {len(response)} results for query: {query}")
+            logger.info(f"🔍 Found {len(response)} results in {self.collection_name} for query: {query}")
             return response
         except Exception as e:
             logger.error(f"Search failed for query '{query}': {e}")
@@ -0,0 +1,531 @@
+"""End-to-end HTTP load benchmark for the copilot app (backend/app.py) and the AI tutor (backend/ask-ai-tutor-backend).
+
+Each app is booted with uvicorn on localhost in its own scratch working directory with LLM_BACKEND=stub,
+then driven by a closed loop of worker threads picking requests from a weighted mix. Results are written
+as JSON and compared against a stored baseline; the exit code is 1 when a regression is found.
+
+    python benchmarks/http_load.py --app both --concurrency 16 --duration 60
+    python benchmarks/http_load.py --app tutor --mix ask=9,upload_pdf=1 --save-baseline
+    python benchmarks/http_load.py --app copilot --url http://localhost:8000   # already running, no boot
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+TUTOR_DIR = BACKEND_DIR / "ask-ai-tutor-backend"
+SAMPLE_PDF = TUTOR_DIR / "data" / "leph101.pdf"
+
+QUESTIONS = [
+    "What is Coulomb's law?",
+    "Explain the electric field due to a point charge",
+    "What is electric flux?",
+    "State Gauss's law and give one application",
+    "How does a dielectric affect the electric field?",
+    "What is the principle of superposition for charges?",
+    "Why is charge quantised?",
+    "What is an electric dipole?",
+    "Describe the field lines of two equal positive charges",
+    "What is the torque on a dipole in a uniform field?",
+]
+TOPICS = ["Electrostatics", "Optics", "Thermodynamics", "Kinematics", "Organic Chemistry", "Algebra", "Calculus"]
+
+Request = Tuple[str, str, Optional[bytes], Dict[str, str]]
+
+# ---------------- Request builders ----------------
+
+def _json(method: str, path: str, payload: dict) -> Request:
+    return method, path, json.dumps(payload).encode("utf-8"), {"Content-Type": "application/json"}
+
+def _multipart(path: str, filename: str, content: bytes, fields: Optional[Dict[str, str]] = None) -> Request:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in (fields or {}).items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8"))
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: application/pdf\r\n\r\n".encode("utf-8") + content + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return "POST", path, b"".join(parts), {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+def test_result_pdf(subject: str, score: int, total: int, incorrect: List[str]) -> bytes:
+    """Single-page PDF in the layout PDFParser.extract_test_results understands"""
+    lines = [f"Subject: {subject}", f"Score: {score}/{total}", f"Incorrect: {', '.join(incorrect)}"]
+    text = " T* ".join(f"({line})Tj" for line in lines)
+    stream = f"BT /F1 12 Tf 14 TL 72 720 Td {text} ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+class Scenarios:
+    """Request builders per endpoint; each call gets the worker index and a per-worker RNG"""
+
+    def __init__(self, upload_subject: str):
+        self.upload_subject = upload_subject
+        self.sample_pdf = SAMPLE_PDF.read_bytes() if SAMPLE_PDF.exists() else None
+        self.test_pdfs = [
+            test_result_pdf(topic, score, 10, random.Random(i).sample(TOPICS, 2))
+            for i, (topic, score) in enumerate((t, s) for t in TOPICS for s in (3, 5, 7))
+        ]
+
+    def generate_schedule(self, worker: int, rng: random.Random) -> Request:
+        return _json("POST", "/generate-schedule", {
+            "student_id": f"bench-{worker}",
+            "exam_date": (date.today() + timedelta(days=rng.randint(3, 14))).isoformat(),
+            "daily_study_hours": rng.randint(1, 6),
+            "difficulty_level": rng.choice(["beginner", "intermediate", "advanced"]),
+            "learning_style": rng.choice(["visual", "auditory", "kinesthetic"]),
+            "focus_areas": rng.sample(TOPICS, rng.randint(1, 3)),
+        })
+
+    def ask_question(self, worker: int, rng: random.Random) -> Request:
+        return _json("POST", "/ask-question", {
+            "query": rng.choice(QUESTIONS),
+            "difficulty_level": rng.choice(["beginner", "intermediate", "advanced"]),
+            "learning_style": rng.choice(["visual", "auditory", "kinesthetic"]),
+        })
+
+    def upload_test_result(self, worker: int, rng: random.Random) -> Request:
+        return _multipart(f"/upload-test-result?student_id=bench-{worker}", "test_result.pdf", rng.choice(self.test_pdfs))
+
+    def ask(self, worker: int, rng: random.Random) -> Request:
+        return _json("POST", "/api/v1/ask", {
+            "query": rng.choice(QUESTIONS),
+            "student_id": f"bench-{worker}",
+            "difficulty": rng.choice(["beginner", "intermediate", "advanced"]),
+            "subject": "physics",
+        })
+
+    def upload_pdf(self, worker: int, rng: random.Random) -> Request:
+        if self.sample_pdf is None:
+            raise FileNotFoundError(f"Sample PDF not found: {SAMPLE_PDF}")
+        # One file name per worker so re-uploads hit the unchanged-content skip
+        return _multipart("/api/v1/upload-pdf", f"bench-w{worker}-{SAMPLE_PDF.name}", self.sample_pdf, {"subject": self.upload_subject})
+
+APPS = {
+    "copilot": {
+        "app_dir": BACKEND_DIR,
+        "module": "app:app",
+        "health": "/health",
+        "mix": {"generate_schedule": 3, "ask_question": 5, "upload_test_result": 2},
+        # Caches would turn repeated prompts into memory lookups; --with-cache keeps them
+        "env": {"LLM_BACKEND": "stub", "LLM_CACHE_ENABLED": "false"},
+        "cache_env": ["LLM_CACHE_ENABLED"],
+    },
+    "tutor": {
+        "app_dir": TUTOR_DIR,
+        "module": "main:app",
+        "health": "/",
+        "mix": {"ask": 9, "upload_pdf": 1},
+        "env": {"LLM_BACKEND": "stub", "ANSWER_CACHE_ENABLED": "false"},
+        "cache_env": ["ANSWER_CACHE_ENABLED"],
+        "seed_files": {"data": [SAMPLE_PDF]},
+    },
+}
+
+# ---------------- App lifecycle ----------------
+
+class AppServer:
+    """uvicorn subprocess for one app, run from a scratch directory so indexes, caches and uploads stay out of the tree"""
+
+    def __init__(self, name: str, port: int, workdir: Path, env: Dict[str, str], fresh: bool = False, log_path: Optional[Path] = None):
+        self.name = name
+        self.spec = APPS[name]
+        self.port = port
+        self.workdir = workdir
+        self.env = env
+        self.fresh = fresh
+        self.log_path = log_path or workdir / "server.log"
+        self.process: Optional[subprocess.Popen] = None
+        self.boot_seconds = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def _prepare(self):
+        if self.fresh and self.workdir.exists():
+            shutil.rmtree(self.workdir)
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        for folder, files in self.spec.get("seed_files", {}).items():
+            (self.workdir / folder).mkdir(exist_ok=True)
+            for source in files:
+                target = self.workdir / folder / source.name
+                if source.exists() and not target.exists():
+                    shutil.copy2(source, target)
+
+    def start(self, timeout: float):
+        self._prepare()
+        env = {**os.environ, **self.env}
+        command = [
+            sys.executable, "-m", "uvicorn", self.spec["module"],
+            "--app-dir", str(self.spec["app_dir"]),
+            "--host", "127.0.0.1", "--port", str(self.port),
+            "--log-level", "warning", "--no-access-log",
+        ]
+        print(f"🚀 Starting {self.name} on {self.url} (cwd {self.workdir}, log {self.log_path})")
+        self._log = open(self.log_path, "w")
+        started = time.perf_counter()
+        self.process = subprocess.Popen(command, cwd=self.workdir, env=env, stdout=self._log, stderr=subprocess.STDOUT)
+        wait_until_healthy(self.url, self.spec["health"], timeout, self.process)
+        self.boot_seconds = round(time.perf_counter() - started, 2)
+        print(f"✅ {self.name} ready in {self.boot_seconds}s")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.send_signal(signal.SIGINT)
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if getattr(self, "_log", None):
+            self._log.close()
+
+def wait_until_healthy(url: str, path: str, timeout: float, process: Optional[subprocess.Popen] = None):
+    deadline = time.monotonic() + timeout
+    parts = urlsplit(url)
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} before becoming healthy")
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            conn.request("GET", path)
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url}{path} not healthy after {timeout}s")
+
+def fetch_json(url: str, path: str) -> Optional[dict]:
+    parts = urlsplit(url)
+    try:
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=10)
+        conn.request("GET", path)
+        response = conn.getresponse()
+        return json.loads(response.read()) if response.status == 200 else None
+    except (OSError, ValueError):
+        return None
+
+# ---------------- Load generation ----------------
+
+class Recorder:
+    """Thread-safe per-endpoint latency samples and status counts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Counter] = {}
+
+    def record(self, endpoint: str, status: int, latency: float):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            self.statuses.setdefault(endpoint, Counter())[str(status)] += 1
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), int(round(p / 100 * len(ordered) + 0.5))))
+    return ordered[rank - 1]
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    errors = sum(n for status, n in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "status": dict(statuses),
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / count * 1000, 2) if count else 0.0,
+            "p50": round(percentile(ordered, 50) * 1000, 2),
+            "p95": round(percentile(ordered, 95) * 1000, 2),
+            "p99": round(percentile(ordered, 99) * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2) if count else 0.0,
+        },
+    }
+
+def parse_mix(text: Optional[str], default: Dict[str, float]) -> Dict[str, float]:
+    if not text:
+        return dict(default)
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def run_load(
+    url: str,
+    mix: Dict[str, float],
+    scenarios: Scenarios,
+    concurrency: int,
+    duration: float,
+    warmup: float = 0.0,
+    max_requests: Optional[int] = None,
+    timeout: float = 60.0,
+    seed: int = 0,
+) -> dict:
+    """Closed-loop load: each worker sends its next request as soon as the previous one completes"""
+    builders: Dict[str, Callable[[int, random.Random], Request]] = {}
+    for name in mix:
+        if not hasattr(scenarios, name):
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        builders[name] = getattr(scenarios, name)
+    names, weights = list(mix), list(mix.values())
+
+    recorder = Recorder()
+    parts = urlsplit(url)
+    started = time.monotonic()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+    issued = 0
+    issued_lock = threading.Lock()
+
+    def take_ticket() -> bool:
+        nonlocal issued
+        if max_requests is None:
+            return True
+        with issued_lock:
+            if issued >= max_requests:
+                return False
+            issued += 1
+            return True
+
+    def worker(index: int):
+        rng = random.Random(seed * 10007 + index)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        while time.monotonic() < stop_at and take_ticket():
+            endpoint = rng.choices(names, weights)[0]
+            method, path, body, headers = builders[endpoint](index, rng)
+            sent = time.monotonic()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                status = 599
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+            if sent >= measure_from:
+                recorder.record(endpoint, status, time.monotonic() - sent)
+        conn.close()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+
+    elapsed = max(min(time.monotonic(), stop_at) - measure_from, 1e-9)
+    all_latencies = [latency for samples in recorder.latencies.values() for latency in samples]
+    all_statuses = sum(recorder.statuses.values(), Counter())
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "overall": summarize(all_latencies, all_statuses, elapsed),
+        "endpoints": {
+            name: summarize(recorder.latencies[name], recorder.statuses[name], elapsed)
+            for name in names if name in recorder.latencies
+        },
+    }
+
+# ---------------- Baseline comparison ----------------
+
+def compare(results: dict, baseline: dict, tolerance: float, error_tolerance: float) -> List[str]:
+    """Regressions of p95/p99 latency, throughput or error rate beyond the tolerances, one line each"""
+    regressions = []
+    for app, current in results["apps"].items():
+        previous = baseline.get("apps", {}).get(app)
+        if not previous:
+            print(f"ℹ️  No baseline for {app}")
+            continue
+        rows = [("overall", current["overall"], previous["overall"])]
+        rows += [
+            (name, stats, previous["endpoints"][name])
+            for name, stats in current["endpoints"].items() if name in previous.get("endpoints", {})
+        ]
+        print(f"\n📊 {app} vs baseline ({baseline.get('meta', {}).get('timestamp', 'unknown')})")
+        print(f"  {'endpoint':<20} {'rps':>16} {'p95 ms':>20} {'p99 ms':>20} {'errors':>14}")
+        for name, now, then in rows:
+            checks = [
+                ("p95", now["latency_ms"]["p95"], then["latency_ms"]["p95"], now["latency_ms"]["p95"] > then["latency_ms"]["p95"] * (1 + tolerance)),
+                ("p99", now["latency_ms"]["p99"], then["latency_ms"]["p99"], now["latency_ms"]["p99"] > then["latency_ms"]["p99"] * (1 + tolerance)),
+                ("throughput", now["throughput_rps"], then["throughput_rps"], now["throughput_rps"] < then["throughput_rps"] * (1 - tolerance)),
+                ("error rate", now["error_rate"], then["error_rate"], now["error_rate"] > then["error_rate"] + error_tolerance),
+            ]
+            for metric, value, reference, regressed in checks:
+                if regressed:
+                    regressions.append(f"{app}/{name} {metric}: {reference} -> {value}")
+            print(
+                f"  {name:<20} {then['throughput_rps']:>7} -> {now['throughput_rps']:<7}"
+                f" {then['latency_ms']['p95']:>9} -> {now['latency_ms']['p95']:<9}"
+                f" {then['latency_ms']['p99']:>9} -> {now['latency_ms']['p99']:<9}"
+                f" {then['error_rate']:>6} -> {now['error_rate']:<6}"
+            )
+    return regressions
+
+def print_report(app: str, report: dict):
+    print(f"\n📈 {app}: {report['overall']['requests']} requests in {report['elapsed_seconds']}s")
+    print(f"  {'endpoint':<20} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in [("overall", report["overall"]), *report["endpoints"].items()]:
+        latency = stats["latency_ms"]
+        print(
+            f"  {name:<20} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>8}"
+            f" {latency['p50']:>9} {latency['p95']:>9} {latency['p99']:>9}"
+        )
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# ---------------- CLI ----------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP load benchmark for the copilot and AI tutor apps")
+    parser.add_argument("--app", choices=["copilot", "tutor", "both"], default="both")
+    parser.add_argument("--url", help="Benchmark an already running server instead of booting one (single --app only)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client connections")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds per app")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds of load before measuring starts")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests (including warm-up)")
+    parser.add_argument("--mix", help="Weighted endpoint mix, e.g. ask=9,upload_pdf=1 (defaults per app)")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765, help="First port to boot apps on")
+    parser.add_argument("--workdir", type=Path, default=BENCH_DIR / ".work", help="Scratch directory the apps run in")
+    parser.add_argument("--fresh", action="store_true", help="Wipe the scratch directory first (cold indexes and caches)")
+    parser.add_argument("--boot-timeout", type=float, default=600, help="Seconds to wait for startup, which includes the initial ingestion")
+    parser.add_argument("--stub-latency-ms", type=float, default=300)
+    parser.add_argument("--stub-latency-sigma", type=float, default=0.3)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--with-cache", action="store_true", help="Leave the LLM response and answer caches enabled")
+    parser.add_argument("--upload-subject", default="benchmark", help="Tutor partition that benchmark uploads are ingested into")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra environment for the booted apps")
+    parser.add_argument("--output", type=Path, help="Results file (default benchmarks/results/http_load-<timestamp>.json)")
+    parser.add_argument("--baseline", type=Path, default=BENCH_DIR / "baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative latency/throughput change")
+    parser.add_argument("--error-tolerance", type=float, default=0.01, help="Allowed absolute error-rate increase")
+    args = parser.parse_args(argv)
+    if args.url and args.app == "both":
+        parser.error("--url needs a single --app")
+    return args
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    apps = ["copilot", "tutor"] if args.app == "both" else [args.app]
+    env = {
+        "LLM_STUB_LATENCY_MS": str(args.stub_latency_ms),
+        "LLM_STUB_LATENCY_SIGMA": str(args.stub_latency_sigma),
+        "LLM_STUB_ERROR_RATE": str(args.stub_error_rate),
+        "LLM_STUB_SEED": str(args.seed),
+    }
+    env.update(item.split("=", 1) for item in args.env)
+    scenarios = Scenarios(args.upload_subject)
+
+    timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    results = {
+        "meta": {
+            "timestamp": timestamp,
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "cpu_count": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "stub_latency_ms": args.stub_latency_ms,
+            "stub_latency_sigma": args.stub_latency_sigma,
+            "stub_error_rate": args.stub_error_rate,
+            "with_cache": args.with_cache,
+        },
+        "apps": {},
+    }
+
+    for offset, app in enumerate(apps):
+        spec = APPS[app]
+        mix = parse_mix(args.mix, spec["mix"])
+        server = None
+        if args.url:
+            url = args.url
+        else:
+            app_env = {**spec["env"], **env}
+            if args.with_cache:
+                for key in spec.get("cache_env", []):
+                    app_env.pop(key, None)
+            server = AppServer(app, args.port + offset, args.workdir / app, app_env, fresh=args.fresh)
+            server.start(args.boot_timeout)
+            url = server.url
+
+        try:
+            print(f"🔥 {app}: {args.concurrency} connections, mix {mix}, {args.warmup}s warm-up + {args.duration}s")
+            report = run_load(
+                url, mix, scenarios, args.concurrency, args.duration,
+                warmup=args.warmup, max_requests=args.requests, timeout=args.timeout, seed=args.seed,
+            )
+            report["mix"] = mix
+            report["boot_seconds"] = server.boot_seconds if server else None
+            report["server_metrics"] = fetch_json(url, "/metrics" if app == "copilot" else "/api/v1/metrics")
+            results["apps"][app] = report
+            print_report(app, report)
+        finally:
+            if server:
+                server.stop()
+
+    output = args.output or BENCH_DIR / "results" / f"http_load-{timestamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\n💾 Results written to {output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"📌 Baseline updated: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"ℹ️  No baseline at {args.baseline}; rerun with --save-baseline to store one")
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance, args.error_tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("\n✅ No regressions against the baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
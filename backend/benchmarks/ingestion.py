@@ -0,0 +1,391 @@
+"""Ingestion micro-benchmarks: each pipeline stage timed on the bundled textbook and on scaled copies of it.
+
+Stages per app (each app runs in its own subprocess, from a scratch directory, because both define
+top-level `services` and `core` packages):
+
+    copilot  extract  PDFParser._extract_with_pdfplumber / _extract_with_pypdf2    pages/sec
+             chunk    PDFParser.chunk_text, EmbeddingUtils.chunk_text_semantic      chunks/sec
+             embed    EmbeddingUtils.create_embeddings_batch                        embeddings/sec
+             vector   VectorService.add_multiple_contents                           docs/sec
+    tutor    extract  PDFProcessor.extract_chapters (swept over --workers)          pages/sec
+             chunk    PDFProcessor.chunk_chapters                                   chunks/sec
+             embed    EmbeddingService.batch_embed (swept over --batch-sizes)       embeddings/sec
+             vector   VectorService.add_documents (swept over --batch-sizes)        docs/sec
+
+Every row also records peak RSS during the stage, and vector rows the bytes the index grew by.
+
+    python benchmarks/ingestion.py --app both --scales 1,4 --batch-sizes 16,64,128 --workers 1,2,4
+    python benchmarks/ingestion.py --app tutor --stages embed,vector --repeat 3
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from http_load import BACKEND_DIR, BENCH_DIR, SAMPLE_PDF, TUTOR_DIR, git_revision
+
+APP_DIRS = {"copilot": BACKEND_DIR, "tutor": TUTOR_DIR}
+STAGES = ["extract", "chunk", "embed", "vector"]
+
+# ---------------- Measurement ----------------
+
+def _current_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+def _max_rss() -> int:
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+class PeakRSS:
+    """Samples resident memory on a background thread while the block runs"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.start = self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _current_rss() or 0)
+
+    def __enter__(self):
+        self.start = _current_rss()
+        if self.start is None:
+            # No /proc: fall back to the process-lifetime high-water mark
+            self.start = self.peak = _max_rss()
+            return self
+        self.peak = self.start
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self.peak = max(self.peak, _current_rss() or 0)
+        else:
+            self.peak = _max_rss()
+
+def dir_size(paths: List[Path]) -> int:
+    total = 0
+    for path in paths:
+        if path.is_file():
+            total += path.stat().st_size
+        elif path.is_dir():
+            total += sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+    return total
+
+class Suite:
+    """Runs stages, keeps the median of --repeat runs and prints one line per result"""
+
+    def __init__(self, app: str, repeat: int):
+        self.app = app
+        self.repeat = repeat
+        self.rows: List[Dict] = []
+
+    def run(self, stage: str, method: str, corpus: str, unit: str, fn: Callable[[int], int], params: Optional[Dict] = None, index_dirs: Optional[List[Path]] = None):
+        """fn gets the repeat index and returns how many units it processed"""
+        runs = []
+        for attempt in range(self.repeat):
+            gc.collect()
+            index_before = dir_size(index_dirs) if index_dirs else None
+            with PeakRSS() as rss:
+                started = time.perf_counter()
+                items = fn(attempt)
+                seconds = time.perf_counter() - started
+            run = {"items": items, "seconds": seconds, "peak_rss_mb": round(rss.peak / 2**20, 1), "rss_delta_mb": round((rss.peak - rss.start) / 2**20, 1)}
+            if index_dirs:
+                run["index_bytes"] = dir_size(index_dirs) - index_before
+            runs.append(run)
+
+        median = sorted(runs, key=lambda r: r["seconds"])[len(runs) // 2]
+        row = {
+            "app": self.app,
+            "stage": stage,
+            "method": method,
+            "corpus": corpus,
+            "params": params or {},
+            "items": median["items"],
+            "unit": unit,
+            "seconds": round(median["seconds"], 4),
+            "seconds_stdev": round(statistics.stdev(r["seconds"] for r in runs), 4) if len(runs) > 1 else 0.0,
+            "rate": round(median["items"] / median["seconds"], 2) if median["seconds"] else 0.0,
+            "rate_unit": f"{unit}/sec",
+            "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+            "rss_delta_mb": max(r["rss_delta_mb"] for r in runs),
+        }
+        if index_dirs:
+            row["index_bytes"] = median["index_bytes"]
+        self.rows.append(row)
+
+        params_text = " ".join(f"{k}={v}" for k, v in row["params"].items())
+        index_text = f" index +{row['index_bytes'] / 2**20:.1f}MB" if index_dirs else ""
+        print(
+            f"  {stage:<8} {method:<28} {corpus:<12} {params_text:<22} {row['items']:>7} {unit:<10}"
+            f" {row['seconds']:>9.3f}s {row['rate']:>10.1f} {row['rate_unit']:<16} peak {row['peak_rss_mb']}MB{index_text}",
+            flush=True,
+        )
+
+# ---------------- Corpora ----------------
+
+def corpus_name(scale: int) -> str:
+    return SAMPLE_PDF.stem if scale == 1 else f"{SAMPLE_PDF.stem}x{scale}"
+
+def salted(texts: List[str], salt: str) -> List[str]:
+    # A unique prefix per text and run keeps embedding caches and content-addressed ids from short-circuiting the work
+    return [f"[{salt}-{i}] {text}" for i, text in enumerate(texts)]
+
+# ---------------- Copilot (backend/app.py) ----------------
+
+def run_copilot(args, suite: Suite, run_id: str):
+    import PyPDF2
+    from services.pdf_parser import PDFParser
+    from services.vector_service import VectorService
+    from utils.embeddings import EmbeddingUtils
+
+    parser = PDFParser()
+    corpora = Path("corpora")
+    corpora.mkdir(exist_ok=True)
+
+    def scaled_pdf(scale: int) -> Path:
+        if scale == 1:
+            return SAMPLE_PDF
+        target = corpora / f"{corpus_name(scale)}.pdf"
+        if not target.exists():
+            reader = PyPDF2.PdfReader(str(SAMPLE_PDF))
+            writer = PyPDF2.PdfWriter()
+            for _ in range(scale):
+                for page in reader.pages:
+                    writer.add_page(page)
+            with open(target, "wb") as f:
+                writer.write(f)
+        return target
+
+    stages = set(args.stages)
+    base_text = None
+    utils = EmbeddingUtils() if stages & {"chunk", "embed"} else None
+
+    for scale in args.scales:
+        corpus = corpus_name(scale)
+        pdf_path = scaled_pdf(scale)
+        page_count = len(PyPDF2.PdfReader(str(pdf_path)).pages)
+
+        if "extract" in stages:
+            suite.run("extract", "_extract_with_pdfplumber", corpus, "pages", lambda _: page_count if parser._extract_with_pdfplumber(str(pdf_path)) else 0)
+            suite.run("extract", "_extract_with_pypdf2", corpus, "pages", lambda _: page_count if parser._extract_with_pypdf2(str(pdf_path)) else 0)
+
+        if base_text is None:
+            base_text = parser._extract_with_pdfplumber(str(SAMPLE_PDF)) or parser._extract_with_pypdf2(str(SAMPLE_PDF))
+        text = "\n".join([base_text] * scale)
+        chunks = parser.chunk_text(text)
+
+        if "chunk" in stages:
+            suite.run("chunk", "PDFParser.chunk_text", corpus, "chunks", lambda _: len(parser.chunk_text(text)))
+            suite.run("chunk", "chunk_text_semantic", corpus, "chunks", lambda _: len(utils.chunk_text_semantic(text)))
+
+        for batch_size in args.batch_sizes:
+            params = {"batch_size": batch_size}
+
+            if "embed" in stages:
+                def embed(attempt: int) -> int:
+                    texts = salted(chunks, f"{run_id}-e{scale}-{batch_size}-{attempt}")
+                    for start in range(0, len(texts), batch_size):
+                        utils.create_embeddings_batch(texts[start:start + batch_size])
+                    return len(texts)
+                suite.run("embed", "create_embeddings_batch", corpus, "embeddings", embed, params)
+
+            if "vector" in stages:
+                index_dirs = [Path(os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")), Path(os.getenv("VECTOR_INDEX_DIR", "./vector_index"))]
+                # Built up front so model loading stays out of the timed region
+                services = [VectorService(collection_name=f"bench_{run_id}_{scale}_{batch_size}_{attempt}") for attempt in range(args.repeat)]
+                def add(attempt: int) -> int:
+                    service = services[attempt]
+                    contents = [
+                        {"content": text, "metadata": {"source": corpus, "chunk": i}}
+                        for i, text in enumerate(salted(chunks, f"{run_id}-v{attempt}"))
+                    ]
+                    for start in range(0, len(contents), batch_size):
+                        service.add_multiple_contents(contents[start:start + batch_size])
+                    return len(contents)
+                suite.run("vector", "add_multiple_contents", corpus, "docs", add, params, index_dirs=index_dirs)
+
+# ---------------- AI tutor (ask-ai-tutor-backend) ----------------
+
+def run_tutor(args, suite: Suite, run_id: str):
+    import fitz
+    from core.config import settings
+    from services.embedding_batcher import EmbeddingBatcher
+    from services.embedding_service import EmbeddingService
+    from services.pdf_service import PDFProcessor
+    from services.vector_service import VectorService
+
+    processor = PDFProcessor(data_dir="./data")
+    corpora = Path("corpora")
+    corpora.mkdir(exist_ok=True)
+
+    def scaled_pdf(scale: int) -> Path:
+        if scale == 1:
+            return SAMPLE_PDF
+        target = corpora / f"{corpus_name(scale)}.pdf"
+        if not target.exists():
+            with fitz.open(SAMPLE_PDF) as source, fitz.open() as out:
+                for _ in range(scale):
+                    out.insert_pdf(source)
+                out.save(target)
+        return target
+
+    stages = set(args.stages)
+    embedder = EmbeddingService() if stages & {"embed", "vector"} else None
+    batcher = EmbeddingBatcher(embedder) if embedder else None
+    index_dirs = [Path(settings.CHROMA_PERSIST_DIR), Path(settings.VECTOR_INDEX_DIR), Path(settings.LEXICAL_INDEX_DIR)]
+
+    for scale in args.scales:
+        corpus = corpus_name(scale)
+        pdf_path = str(scaled_pdf(scale))
+
+        chapters = None
+        if "extract" in stages:
+            for workers in args.workers:
+                # The app keeps its extraction pool for the life of the process, so start it outside the timing
+                processor.extract_chapters(pdf_path, workers=workers)
+                def extract(_: int) -> int:
+                    nonlocal chapters
+                    chapters = processor.extract_chapters(pdf_path, workers=workers)
+                    return processor.last_extraction_stats["pages"]
+                # Small documents are clamped to fewer workers, so record what actually ran
+                suite.run("extract", "extract_chapters", corpus, "pages", extract, {"workers": workers})
+                suite.rows[-1]["params"]["effective_workers"] = processor.last_extraction_stats["workers"]
+        if chapters is None:
+            chapters = processor.extract_chapters(pdf_path)
+
+        chunks = processor.chunk_chapters(chapters)
+        if "chunk" in stages:
+            suite.run("chunk", "chunk_chapters", corpus, "chunks", lambda _: len(processor.chunk_chapters(chapters)), processor.chunking_settings())
+
+        texts = [chunk["text"] for chunk in chunks]
+        for batch_size in args.batch_sizes:
+            params = {"batch_size": batch_size}
+
+            if "embed" in stages:
+                suite.run(
+                    "embed", "batch_embed", corpus, "embeddings",
+                    lambda attempt: len(embedder.batch_embed(salted(texts, f"{run_id}-e{scale}-{batch_size}-{attempt}"), batch_size=batch_size)),
+                    params,
+                )
+
+            if "vector" in stages:
+                services = [VectorService(subject=f"bench_{run_id}_{scale}_{batch_size}_{attempt}", embedder=embedder, batcher=batcher) for attempt in range(args.repeat)]
+                def add(attempt: int) -> int:
+                    service = services[attempt]
+                    documents = [
+                        (text, {"source": corpus, "chapter": chunk["chapter"], "page": chunk["page"], "chunk": chunk["chunk"]})
+                        for text, chunk in zip(salted(texts, f"{run_id}-v{attempt}"), chunks)
+                    ]
+                    return len(asyncio.run(service.add_documents(documents, batch_size=batch_size)))
+                suite.run("vector", "add_documents", corpus, "docs", add, params, index_dirs=index_dirs)
+
+    processor.shutdown()
+
+# ---------------- CLI ----------------
+
+def _int_list(text: str) -> List[int]:
+    return [int(item) for item in text.split(",") if item.strip()]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestion pipeline micro-benchmarks for the copilot and AI tutor apps")
+    parser.add_argument("--app", choices=["copilot", "tutor", "both"], default="both")
+    parser.add_argument("--stages", type=lambda s: [x for x in s.split(",") if x], default=STAGES, help=f"Comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument("--scales", type=_int_list, default=[1, 4], help="Corpus sizes as multiples of the bundled textbook")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[16, 64, 128], help="Embedding and upsert batch sizes to sweep")
+    parser.add_argument("--workers", type=_int_list, default=[1, 2, 4], help="PDF extraction worker counts to sweep (tutor)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per measurement; the median is reported")
+    parser.add_argument("--workdir", type=Path, default=BENCH_DIR / ".work", help="Scratch directory the stages run in")
+    parser.add_argument("--output", type=Path, help="Results file (default benchmarks/results/ingestion-<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true", help="Show the apps' own info logging")
+    parser.add_argument("--child", choices=list(APP_DIRS), help=argparse.SUPPRESS)
+    parser.add_argument("--child-output", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+    return args
+
+def run_child(args) -> int:
+    """Runs inside the app's scratch directory with the app's packages importable"""
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    sys.path.insert(0, str(APP_DIRS[args.child]))
+    suite = Suite(args.child, args.repeat)
+    run_id = uuid.uuid4().hex[:8]
+    print(f"\n📦 {args.child} (run {run_id}, cwd {os.getcwd()})", flush=True)
+    (run_copilot if args.child == "copilot" else run_tutor)(args, suite, run_id)
+    args.child_output.write_text(json.dumps(suite.rows))
+    return 0
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+    if args.child:
+        return run_child(args)
+
+    if not SAMPLE_PDF.exists():
+        print(f"❌ Sample PDF not found: {SAMPLE_PDF}")
+        return 1
+
+    timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    results = {
+        "meta": {
+            "timestamp": timestamp,
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "cpu_count": os.cpu_count(),
+            "sample_pdf": SAMPLE_PDF.name,
+            "stages": args.stages,
+            "scales": args.scales,
+            "batch_sizes": args.batch_sizes,
+            "workers": args.workers,
+            "repeat": args.repeat,
+        },
+        "results": [],
+        "failed": [],
+    }
+
+    for app in (["copilot", "tutor"] if args.app == "both" else [args.app]):
+        workdir = args.workdir / f"ingestion-{app}"
+        workdir.mkdir(parents=True, exist_ok=True)
+        child_output = workdir / "rows.json"
+        child_output.unlink(missing_ok=True)
+        command = [sys.executable, str(Path(__file__).resolve()), *argv, "--child", app, "--child-output", str(child_output.resolve())]
+        completed = subprocess.run(command, cwd=workdir)
+        if completed.returncode != 0 or not child_output.exists():
+            print(f"❌ {app} benchmark failed with exit code {completed.returncode}")
+            results["failed"].append(app)
+            continue
+        results["results"].extend(json.loads(child_output.read_text()))
+
+    output = args.output or BENCH_DIR / "results" / f"ingestion-{timestamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\n💾 Results written to {output}")
+    return 1 if results["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,74 @@
 import os
 import json
+import asyncio
 import google.generativeai as genai
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from services.response_cache import ResponseCache
+from services.single_flight import SingleFlight
+from services.upstream import UpstreamClient, UpstreamUnavailable
+from services.llm_stub import StubModel
 
 load_dotenv()
 
+# Methods whose prompts depend only on request parameters, and how long their answers stay fresh.
+# Override with LLM_CACHE_TTL_<METHOD>=seconds; personalized methods are never cached.
+CACHE_TTL_SECONDS = {
+    "explain_concept": 7 * 24 * 3600,
+    "search_content": 24 * 3600,
+    "summarize_content": 30 * 24 * 3600,
+    "generate_practice_questions": 6 * 3600,
+}
+
 class LLMService:
-    def __init__(self, use_gemini: bool = True):
-        self.use_gemini = use_gemini
+    def __init__(self, use_gemini: bool = True, response_cache: Optional[ResponseCache] = None):
+        # LLM_BACKEND=stub swaps in an offline model for load tests; it speaks the Gemini interface
+        self.backend = os.getenv("LLM_BACKEND", "gemini" if use_gemini else "openai").lower()
+        if self.backend not in ("gemini", "openai", "stub"):
+            raise ValueError(f"Unknown LLM_BACKEND: {self.backend}")
+        self.use_gemini = self.backend in ("gemini", "stub")
+        self.response_cache = response_cache
+        if self.response_cache is None and os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true":
+            self.response_cache = ResponseCache()
+        self.single_flight = SingleFlight()
+        self.upstream = UpstreamClient(
+            rate_per_second=float(os.getenv("LLM_RATE_PER_SECOND", 10)),
+            burst=int(os.getenv("LLM_RATE_BURST", 20)),
+            initial_concurrency=int(os.getenv("LLM_INITIAL_CONCURRENCY", 8)),
+            min_concurrency=int(os.getenv("LLM_MIN_CONCURRENCY", 1)),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 32)),
+            latency_target=float(os.getenv("LLM_LATENCY_TARGET_SECONDS", 8)),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", 4)),
+            deadline=float(os.getenv("LLM_DEADLINE_SECONDS", 30)),
+        )
         
-        if self.use_gemini:
+        if self.backend == "stub":
+            self.model_name = "stub"
+            self.model = StubModel(
+                latency_ms=float(os.getenv("LLM_STUB_LATENCY_MS", 800)),
+                latency_sigma=float(os.getenv("LLM_STUB_LATENCY_SIGMA", 0.5)),
+                error_rate=float(os.getenv("LLM_STUB_ERROR_RATE", 0)),
+                seed=int(os.getenv("LLM_STUB_SEED", 0)),
+            )
+            print("Initialized with stub LLM backend")
+        elif self.use_gemini:
             api_key = os.getenv("GOOGLE_API_KEY")
             if not api_key:
                 raise ValueError("GOOGLE_API_KEY not found in environment variables")
             
             genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
+            self.model_name = 'gemini-2.5-flash'
+            self.model = genai.GenerativeModel(self.model_name)
             print("Initialized with Google Gemini")
         else:
             try:
                 from langchain.chat_models import ChatOpenAI
+                self.model_name = "gpt-3.5-turbo"
                 self.model = ChatOpenAI(
                     temperature=0.7,
                     openai_api_key=os.getenv("OPENAI_API_KEY"),
-                    model_name="gpt-3.5-turbo"
+                    model_name=self.model_name
                 )
                 print("Initialized with OpenAI GPT")
             except ImportError:
@@ -39,29 +82,139 @@ class LLMService:
             print(f"Gemini generation error: {e}")
             return f"Error generating response: {str(e)}"
 
+    async def _agenerate_with_gemini(self, prompt: str) -> str:
+        # Throttling and transient failures are retried by the upstream client; if they persist
+        # UpstreamUnavailable propagates instead of an error string reaching the student
+        try:
+            response = await self.upstream.call(lambda: self.model.generate_content_async(prompt))
+            return response.text
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            print(f"Gemini generation error: {e}")
+            return f"Error generating response: {str(e)}"
+
+    def _openai_chain(self):
+        from langchain.prompts import PromptTemplate
+        from langchain.chains import LLMChain
+
+        prompt_template = PromptTemplate(
+            input_variables=["prompt"],
+            template="{prompt}"
+        )
+        return LLMChain(llm=self.model, prompt=prompt_template)
+
     def _generate_with_openai(self, prompt: str) -> str:
         try:
-            from langchain.prompts import PromptTemplate
-            from langchain.chains import LLMChain
-            
-            prompt_template = PromptTemplate(
-                input_variables=["prompt"],
-                template="{prompt}"
-            )
-            chain = LLMChain(llm=self.model, prompt=prompt_template)
-            response = chain.run(prompt=prompt)
+            response = self._openai_chain().run(prompt=prompt)
             return response
         except Exception as e:
             print(f"OpenAI generation error: {e}")
             return f"Error generating response: {str(e)}"
 
-    def generate_response(self, prompt: str) -> str:
+    async def _agenerate_with_openai(self, prompt: str) -> str:
+        try:
+            chain = self._openai_chain()
+            if hasattr(chain, "arun"):
+                return await self.upstream.call(lambda: chain.arun(prompt=prompt))
+            # Older LangChain builds have no async path; keep the blocking call off the event loop
+            return await self.upstream.call(lambda: asyncio.to_thread(chain.run, prompt=prompt))
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            print(f"OpenAI generation error: {e}")
+            return f"Error generating response: {str(e)}"
+
+    def _generate(self, prompt: str) -> str:
         if self.use_gemini:
             return self._generate_with_gemini(prompt)
         else:
             return self._generate_with_openai(prompt)
 
-    def generate_revision_schedule(self, weak_areas: List[Dict], study_time: int = 60, days: int = 7) -> Dict:
+    async def _agenerate(self, prompt: str) -> str:
+        if self.use_gemini:
+            return await self._agenerate_with_gemini(prompt)
+        else:
+            return await self._agenerate_with_openai(prompt)
+
+    @staticmethod
+    def _cache_ttl(method: Optional[str]) -> Optional[float]:
+        if method not in CACHE_TTL_SECONDS:
+            return None
+        return float(os.getenv(f"LLM_CACHE_TTL_{method.upper()}", CACHE_TTL_SECONDS[method]))
+
+    def generate_response(
+        self,
+        prompt: str,
+        method: Optional[str] = None,
+        personalized: bool = False,
+        cacheable: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """Generate text for a prompt, served from the response cache when method has a TTL"""
+        # personalized=True always goes upstream; cacheable can veto storing a response
+        key, ttl = self._cache_slot(prompt, method, personalized)
+        if key is None:
+            return self._generate(prompt)
+
+        cached = self.response_cache.get(key, method)
+        if cached is not None:
+            return cached
+
+        response = self._generate(prompt)
+        if self._should_cache(response, cacheable):
+            self.response_cache.put(key, method, response, ttl)
+        return response
+
+    async def generate_response_async(
+        self,
+        prompt: str,
+        method: Optional[str] = None,
+        personalized: bool = False,
+        cacheable: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """Non-blocking generate_response for use from request handlers"""
+        key, ttl = self._cache_slot(prompt, method, personalized)
+        if key is not None:
+            # SQLite lookups and writes run in a worker thread, never on the event loop
+            cached = await asyncio.to_thread(self.response_cache.get, key, method)
+            if cached is not None:
+                return cached
+
+        async def call_upstream() -> str:
+            response = await self._agenerate(prompt)
+            if key is not None and self._should_cache(response, cacheable):
+                await asyncio.to_thread(self.response_cache.put, key, method, response, ttl)
+            return response
+
+        # Identical prompts already in flight share that call instead of starting their own
+        return await self.single_flight.run(ResponseCache.key(self.model_name, prompt), call_upstream)
+
+    def _cache_slot(self, prompt: str, method: Optional[str], personalized: bool):
+        """(cache key, ttl) for a cacheable call, or (None, None) when it must go upstream"""
+        ttl = self._cache_ttl(method)
+        if self.response_cache is None or ttl is None or personalized:
+            if self.response_cache is not None and personalized:
+                self.response_cache.record_bypass()
+            return None, None
+        return self.response_cache.key(self.model_name, prompt), ttl
+
+    @staticmethod
+    def _should_cache(response: str, cacheable: Optional[Callable[[str], bool]]) -> bool:
+        return not response.startswith("Error generating response") and (cacheable is None or cacheable(response))
+
+    @staticmethod
+    def _extract_json(response: str, opener: str, closer: str):
+        """Parse the outermost JSON object or array in a model response, or None"""
+        json_start = response.find(opener)
+        json_end = response.rfind(closer) + 1
+        if json_start == -1 or json_end == 0:
+            return None
+        try:
+            return json.loads(response[json_start:json_end])
+        except ValueError:
+            return None
+
+    def _schedule_prompt(self, weak_areas: List[Dict], study_time: int, days: int) -> str:
         weak_areas_text = "\n".join([
             f"- {area.get('topic', 'Unknown')}: Confidence {area.get('confidence_score', 0):.2f}, "
             f"Difficulty: {area.get('difficulty_level', 'intermediate')}"
@@ -107,9 +260,10 @@ class LLMService:
             "total_study_time": {study_time * days}
         }}
         """
-        
+        return prompt
+
+    def _parse_schedule(self, response: str, weak_areas: List[Dict], study_time: int, days: int) -> Dict:
         try:
-            response = self.generate_response(prompt)
             json_start = response.find('{')
             json_end = response.rfind('}') + 1
             
@@ -121,6 +275,20 @@ class LLMService:
             print(f"Error generating schedule: {e}")
             return self._create_fallback_schedule(weak_areas, study_time, days)
 
+    def generate_revision_schedule(self, weak_areas: List[Dict], study_time: int = 60, days: int = 7) -> Dict:
+        prompt = self._schedule_prompt(weak_areas, study_time, days)
+        response = self.generate_response(prompt, method="generate_revision_schedule", personalized=True)
+        return self._parse_schedule(response, weak_areas, study_time, days)
+
+    async def generate_revision_schedule_async(self, weak_areas: List[Dict], study_time: int = 60, days: int = 7) -> Dict:
+        prompt = self._schedule_prompt(weak_areas, study_time, days)
+        try:
+            response = await self.generate_response_async(prompt, method="generate_revision_schedule", personalized=True)
+        except UpstreamUnavailable as e:
+            print(f"Error generating schedule: {e}")
+            return self._create_fallback_schedule(weak_areas, study_time, days)
+        return self._parse_schedule(response, weak_areas, study_time, days)
+
     def _create_fallback_schedule(self, weak_areas: List[Dict], study_time: int, days: int) -> Dict:
         schedule = []
         base_date = datetime.now()
@@ -169,8 +337,8 @@ class LLMService:
         }
         return methods.get(difficulty_level, "Practice and review")
 
-    def explain_concept(self, topic: str, context: str = "", difficulty: str = "intermediate", learning_style: str = "visual") -> str:
-        prompt = f"""
+    def _explain_prompt(self, topic: str, context: str, difficulty: str, learning_style: str) -> str:
+        return f"""
         Explain the concept "{topic}" at a {difficulty} level for a {learning_style} learner.
 
         Additional context: {context}
@@ -183,10 +351,17 @@ class LLMService:
         - Structure explanation clearly with definition, key points, examples, common mistakes, and study tips
         - Keep it concise, under 200 words
         """
-        return self.generate_response(prompt)
 
-    def analyze_weak_areas(self, test_results: Dict) -> List[Dict]:
-        prompt = f"""
+    def explain_concept(self, topic: str, context: str = "", difficulty: str = "intermediate", learning_style: str = "visual") -> str:
+        prompt = self._explain_prompt(topic, context, difficulty, learning_style)
+        return self.generate_response(prompt, method="explain_concept")
+
+    async def explain_concept_async(self, topic: str, context: str = "", difficulty: str = "intermediate", learning_style: str = "visual") -> str:
+        prompt = self._explain_prompt(topic, context, difficulty, learning_style)
+        return await self.generate_response_async(prompt, method="explain_concept")
+
+    def _weak_areas_prompt(self, test_results: Dict) -> str:
+        return f"""
         Analyze the following test results to identify weak areas.
 
         Score: {test_results.get('score', 0)}/{test_results.get('total', 0)}
@@ -213,8 +388,9 @@ class LLMService:
             }}
         ]
         """
+
+    def _parse_weak_areas(self, response: str, test_results: Dict) -> List[Dict]:
         try:
-            response = self.generate_response(prompt)
             json_start = response.find('[')
             json_end = response.rfind(']') + 1
             if json_start != -1 and json_end != -1:
@@ -225,6 +401,18 @@ class LLMService:
             print(f"Error analyzing weak areas: {e}")
             return self._create_fallback_analysis(test_results)
 
+    def analyze_weak_areas(self, test_results: Dict) -> List[Dict]:
+        response = self.generate_response(self._weak_areas_prompt(test_results), method="analyze_weak_areas", personalized=True)
+        return self._parse_weak_areas(response, test_results)
+
+    async def analyze_weak_areas_async(self, test_results: Dict) -> List[Dict]:
+        try:
+            response = await self.generate_response_async(self._weak_areas_prompt(test_results), method="analyze_weak_areas", personalized=True)
+        except UpstreamUnavailable as e:
+            print(f"Error analyzing weak areas: {e}")
+            return self._create_fallback_analysis(test_results)
+        return self._parse_weak_areas(response, test_results)
+
     def _create_fallback_analysis(self, test_results: Dict) -> List[Dict]:
         weak_areas = []
         score = test_results.get('score', 0)
@@ -252,8 +440,8 @@ class LLMService:
 
         return weak_areas
 
-    def generate_practice_questions(self, topic: str, difficulty: str = "intermediate", num_questions: int = 5) -> List[Dict]:
-        prompt = f"""
+    def _practice_questions_prompt(self, topic: str, difficulty: str, num_questions: int) -> str:
+        return f"""
         Generate {num_questions} multiple-choice practice questions for the topic "{topic}" at a {difficulty} level.
 
         For each question, include:
@@ -264,8 +452,13 @@ class LLMService:
 
         Output only valid plain JSON without special characters or markdown.
         """
+
+    def _is_question_list(self, response: str) -> bool:
+        # Only well-formed question lists are cached, so one bad generation is not replayed for hours
+        return isinstance(self._extract_json(response, '[', ']'), list)
+
+    def _parse_practice_questions(self, response: str) -> List[Dict]:
         try:
-            response = self.generate_response(prompt)
             json_start = response.find('[')
             json_end = response.rfind(']') + 1
             if json_start != -1 and json_end != -1:
@@ -276,8 +469,18 @@ class LLMService:
             print(f"Error generating questions: {e}")
             return []
 
-    def summarize_content(self, content: str, max_length: int = 200) -> str:
-        prompt = f"""
+    def generate_practice_questions(self, topic: str, difficulty: str = "intermediate", num_questions: int = 5) -> List[Dict]:
+        prompt = self._practice_questions_prompt(topic, difficulty, num_questions)
+        response = self.generate_response(prompt, method="generate_practice_questions", cacheable=self._is_question_list)
+        return self._parse_practice_questions(response)
+
+    async def generate_practice_questions_async(self, topic: str, difficulty: str = "intermediate", num_questions: int = 5) -> List[Dict]:
+        prompt = self._practice_questions_prompt(topic, difficulty, num_questions)
+        response = await self.generate_response_async(prompt, method="generate_practice_questions", cacheable=self._is_question_list)
+        return self._parse_practice_questions(response)
+
+    def _summary_prompt(self, content: str, max_length: int) -> str:
+        return f"""
         Summarize this educational content in under {max_length} words.
 
         Use plain English. Avoid special characters or formatting. Focus only on important concepts and key ideas.
@@ -287,10 +490,15 @@ class LLMService:
 
         Summary:
         """
-        return self.generate_response(prompt)
 
-    def check_answer(self, question: str, student_answer: str, correct_answer: str) -> Dict:
-        prompt = f"""
+    def summarize_content(self, content: str, max_length: int = 200) -> str:
+        return self.generate_response(self._summary_prompt(content, max_length), method="summarize_content")
+
+    async def summarize_content_async(self, content: str, max_length: int = 200) -> str:
+        return await self.generate_response_async(self._summary_prompt(content, max_length), method="summarize_content")
+
+    def _check_answer_prompt(self, question: str, student_answer: str, correct_answer: str) -> str:
+        return f"""
         Question: {question}
         Student Answer: {student_answer}
         Correct Answer: {correct_answer}
@@ -305,8 +513,9 @@ class LLMService:
 
         Use only valid JSON. No special characters or markdown.
         """
+
+    def _parse_check_answer(self, response: str, student_answer: str, correct_answer: str) -> Dict:
         try:
-            response = self.generate_response(prompt)
             json_start = response.find('{')
             json_end = response.rfind('}') + 1
             if json_start != -1 and json_end != -1:
@@ -321,8 +530,18 @@ class LLMService:
         except Exception as e:
             print(f"Error checking answer: {e}")
             return {"error": f"Failed to check answer: {str(e)}"}
-    def search_content(self, query: str, topic: Optional[str] = "", difficulty: str = "intermediate") -> str:
-     prompt = f"""
+
+    def check_answer(self, question: str, student_answer: str, correct_answer: str) -> Dict:
+        prompt = self._check_answer_prompt(question, student_answer, correct_answer)
+        response = self.generate_response(prompt, method="check_answer", personalized=True)
+        return self._parse_check_answer(response, student_answer, correct_answer)
+
+    async def check_answer_async(self, question: str, student_answer: str, correct_answer: str) -> Dict:
+        prompt = self._check_answer_prompt(question, student_answer, correct_answer)
+        response = await self.generate_response_async(prompt, method="check_answer", personalized=True)
+        return self._parse_check_answer(response, student_answer, correct_answer)
+    def _search_prompt(self, query: str, topic: Optional[str], difficulty: str) -> str:
+     return f"""
     Search for and explain the following query: "{query}" related to the topic "{topic}" at a {difficulty} level.
 
     Instructions:
@@ -335,4 +554,9 @@ class LLMService:
 
     Response:
     """
-     return self.generate_response(prompt)
\ No newline at end of file
+
+    def search_content(self, query: str, topic: Optional[str] = "", difficulty: str = "intermediate") -> str:
+        return self.generate_response(self._search_prompt(query, topic, difficulty), method="search_content")
+
+    async def search_content_async(self, query: str, topic: Optional[str] = "", difficulty: str = "intermediate") -> str:
+        return await self.generate_response_async(self._search_prompt(query, topic, difficulty), method="search_content")
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+class StubThrottled(Exception):
+    """Injected failure shaped like a 429 from the model API"""
+    code = 429
+
+class StubModel:
+    """Offline stand-in for genai.GenerativeModel with deterministic, schema-valid responses"""
+
+    # Latency is log-normal around latency_ms (sigma 0 makes it constant); error_rate injects 429s
+    def __init__(self, latency_ms: float = 800, latency_sigma: float = 0.5, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+
+    def _latency(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        return self._rng.lognormvariate(0, self.latency_sigma) * self.latency_ms / 1000 if self.latency_sigma else self.latency_ms / 1000
+
+    def _maybe_fail(self):
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise StubThrottled("429 Resource has been exhausted (stub)")
+
+    def generate_content(self, contents, stream: bool = False):
+        prompt = _prompt_text(contents)
+        time.sleep(self._latency())
+        self._maybe_fail()
+        return _response(respond(prompt), prompt)
+
+    async def generate_content_async(self, contents, stream: bool = False):
+        prompt = _prompt_text(contents)
+        text = respond(prompt)
+        latency = self._latency()
+        self._maybe_fail()
+        if stream:
+            # First chunk after roughly a fifth of the latency, the rest spread over the remainder
+            await asyncio.sleep(latency * 0.2)
+            return _StubStream(text, latency * 0.8)
+        await asyncio.sleep(latency)
+        return _response(text, prompt)
+
+def _prompt_text(contents) -> str:
+    if isinstance(contents, str):
+        return contents
+    # Chat-style [{"role": ..., "parts": [...]}] as used by the tutor service
+    return "\n".join(str(part) for message in contents for part in message.get("parts", []))
+
+def _response(text: str, prompt: str):
+    usage = SimpleNamespace(prompt_token_count=len(prompt.split()), candidates_token_count=len(text.split()))
+    return SimpleNamespace(text=text, parts=[text], usage_metadata=usage)
+
+class _StubStream:
+    def __init__(self, text: str, duration: float, chunk_words: int = 8):
+        words = text.split(" ")
+        self.chunks = [" ".join(words[i:i + chunk_words]) + " " for i in range(0, len(words), chunk_words)]
+        self.delay = duration / max(len(self.chunks), 1)
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield SimpleNamespace(text=chunk, parts=[chunk])
+
+def _pick(prompt: str, options: List[str]) -> str:
+    digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+    return options[digest % len(options)]
+
+def _int(pattern: str, prompt: str, default: int) -> int:
+    match = re.search(pattern, prompt)
+    return int(match.group(1)) if match else default
+
+def _quoted(prompt: str, default: str) -> str:
+    match = re.search(r'"([^"]+)"', prompt)
+    return match.group(1) if match else default
+
+def respond(prompt: str) -> str:
+    """Canned answer in the shape the calling method parses, chosen from the prompt wording"""
+    if "revision schedule" in prompt:
+        return _schedule(prompt)
+    if "Analyze the following test results" in prompt:
+        return _weak_areas(prompt)
+    if "multiple-choice practice questions" in prompt:
+        return _questions(prompt)
+    if "Student Answer:" in prompt:
+        return _check_answer(prompt)
+    if "QUESTION:" in prompt and "CONTEXT:" in prompt:
+        return _rag_answer(prompt)
+    topic = _quoted(prompt, "this topic")
+    return (
+        f"{topic} is explained here in plain words. "
+        + _pick(prompt, [
+            "Start from the definition, then look at a worked example and the most common mistake.",
+            "Focus on the key idea, how it shows up in everyday situations, and how to check your answer.",
+            "Remember the main rule, practise two short problems, and review where errors usually happen.",
+        ])
+    )
+
+def _schedule(prompt: str) -> str:
+    days = _int(r"(\d+)-day", prompt, 7)
+    minutes = _int(r"(\d+) minutes per day", prompt, 60)
+    topics = re.findall(r"^\s*- ([^:\n]+): Confidence", prompt, flags=re.MULTILINE) or ["General revision"]
+    schedule = [
+        {
+            "day": day + 1,
+            "date": f"2024-01-{15 + day:02d}",
+            "topics": [{
+                "topic": topics[day % len(topics)],
+                "time_allocated": minutes,
+                "study_method": "Practice problems",
+                "priority": "high" if day < len(topics) else "medium",
+                "resources": ["textbook", "online exercises"],
+            }],
+        }
+        for day in range(days)
+    ]
+    return json.dumps({
+        "schedule": schedule,
+        "priorities": topics[:3],
+        "study_methods": {topic: "Practice problems and examples" for topic in topics},
+        "total_study_time": minutes * days,
+    })
+
+def _weak_areas(prompt: str) -> str:
+    topic = re.search(r"Topic: (.+)", prompt)
+    score = re.search(r"Score: (\d+)/(\d+)", prompt)
+    confidence = round(int(score.group(1)) / int(score.group(2)), 2) if score and int(score.group(2)) else 0.5
+    return json.dumps([{
+        "topic": topic.group(1).strip() if topic else "General",
+        "confidence_score": min(confidence, 0.6),
+        "difficulty_level": "intermediate",
+        "focus_areas": ["core concepts"],
+        "study_approach": "Revise basics",
+    }])
+
+def _questions(prompt: str) -> str:
+    topic = _quoted(prompt, "the topic")
+    return json.dumps([
+        {
+            "question": f"Question {i + 1} about {topic}?",
+            "options": {"A": "Option A", "B": "Option B", "C": "Option C", "D": "Option D"},
+            "correct_answer": _pick(f"{prompt}{i}", ["A", "B", "C", "D"]),
+            "explanation": f"This checks a key idea of {topic}.",
+        }
+        for i in range(_int(r"Generate (\d+) multiple-choice", prompt, 5))
+    ])
+
+def _check_answer(prompt: str) -> str:
+    student = re.search(r"Student Answer: (.*)", prompt)
+    correct = re.search(r"Correct Answer: (.*)", prompt)
+    is_correct = bool(student and correct and student.group(1).strip().lower() == correct.group(1).strip().lower())
+    return json.dumps({
+        "is_correct": is_correct,
+        "feedback": "Well done." if is_correct else "Not quite, compare your answer with the key idea.",
+        "correct_explanation": f"The correct answer is {correct.group(1).strip() if correct else 'given above'}.",
+        "improvement_hints": ["Review the topic", "Try a similar problem"],
+    })
+
+def _rag_answer(prompt: str) -> str:
+    question = re.search(r"QUESTION: (.*)", prompt)
+    pages = re.findall(r"Source \d+ \(Page ([^,]+),", prompt)
+    cited = ", ".join(dict.fromkeys(pages)) or "N/A"
+    return (
+        f"{question.group(1).strip() if question else 'This question'} is answered by the provided context. "
+        f"The key concept is stated directly in the textbook passage and illustrated with an example. "
+        f"See page(s) {cited} for details."
+    )
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class ResponseCache:
+    """Bounded in-memory LRU in front of a persistent SQLite store of LLM responses, with per-entry expiry"""
+
+    # Expired rows are deleted on open and then once every this many writes
+    PURGE_EVERY = 256
+
+    def __init__(self, db_path: Optional[str] = None, max_memory_items: Optional[int] = None):
+        db_path = db_path or os.getenv("LLM_CACHE_DB", "./cache/llm_responses.sqlite")
+        self.max_memory_items = max_memory_items or int(os.getenv("LLM_CACHE_MEMORY_ITEMS", 1000))
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, method TEXT, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+        self._conn.commit()
+        self._puts_since_purge = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.purged = self.purge_expired()
+        self.per_method: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def key(model_name: str, prompt: str) -> str:
+        payload = f"{model_name}\0{prompt}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, method: str, outcome: str):
+        counters = self.per_method.setdefault(method, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def get(self, key: str, method: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self._count(method, "hits")
+                return entry[0]
+            self._memory.pop(key, None)
+
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None:
+                self._remember(key, row[0], row[1])
+                self.disk_hits += 1
+                self._count(method, "hits")
+                return row[0]
+
+            self.misses += 1
+            self._count(method, "misses")
+            return None
+
+    def put(self, key: str, method: str, response: str, ttl_seconds: float):
+        expires_at = time.time() + ttl_seconds
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, method, response, expires_at) VALUES (?, ?, ?, ?)",
+                (key, method, response, expires_at)
+            )
+            self._puts_since_purge += 1
+            if self._puts_since_purge >= self.PURGE_EVERY:
+                self.purged += self._purge_locked()
+            self._conn.commit()
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            removed = self._purge_locked()
+            self._conn.commit()
+            return removed
+
+    def _purge_locked(self) -> int:
+        self._puts_since_purge = 0
+        return self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def _remember(self, key: str, response: str, expires_at: float):
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_items": len(self._memory),
+                "max_memory_items": self.max_memory_items,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "purged": self.purged,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "per_method": {method: dict(counters) for method, counters in self.per_method.items()},
+            }
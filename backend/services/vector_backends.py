@@ -0,0 +1,387 @@
+# Vector storage backends 
+import atexit
+import json
+import operator
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+import chromadb
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class VectorBackend:
+    """Storage and nearest-neighbour search for embedded documents"""
+
+    name = "base"
+
+    def count(self, where: Optional[dict] = None) -> int:
+        raise NotImplementedError
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: List[str], metadatas: List[dict]):
+        raise NotImplementedError
+
+    def query(self, embedding: List[float], n_results: int, where: Optional[dict] = None) -> List[Dict]:
+        """Top matches as {"id", "document", "metadata", "score"} with cosine similarity scores"""
+        raise NotImplementedError
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Stored records as {"id", "document", "metadata"}"""
+        raise NotImplementedError
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[dict] = None):
+        raise NotImplementedError
+
+    def flush(self):
+        """Make buffered writes durable; write-through backends have nothing to do"""
+
+class ChromaBackend(VectorBackend):
+    name = "chroma"
+
+    def __init__(self, collection_name: str, persist_dir: Optional[str] = None):
+        self.client = chromadb.PersistentClient(
+            path=persist_dir or os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+        )
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            metadata={"hnsw:space": "cosine"}
+        )
+
+    def count(self, where=None):
+        if where:
+            return len(self.collection.get(where=where, include=[])["ids"])
+        return self.collection.count()
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def query(self, embedding, n_results, where=None):
+        params = {
+            "query_embeddings": [embedding],
+            "n_results": n_results,
+            "include": ["documents", "metadatas", "distances"]
+        }
+        if where:
+            params["where"] = where
+        results = self.collection.query(**params)
+        return [
+            {"id": doc_id, "document": doc, "metadata": meta or {}, "score": 1 - dist}
+            for doc_id, doc, meta, dist in zip(
+                results["ids"][0],
+                results["documents"][0],
+                results["metadatas"][0],
+                results["distances"][0]
+            )
+        ]
+
+    def get(self, ids=None, where=None, limit=None):
+        results = self.collection.get(ids=ids, where=where, limit=limit, include=["documents", "metadatas"])
+        return [
+            {"id": doc_id, "document": doc, "metadata": meta or {}}
+            for doc_id, doc, meta in zip(results["ids"], results["documents"], results["metadatas"])
+        ]
+
+    def delete(self, ids=None, where=None):
+        self.collection.delete(ids=ids, where=where)
+
+class _MetadataColumns:
+    """Metadata fields dictionary-encoded into integer arrays, so where filters are vectorized comparisons"""
+
+    MISSING = -1
+    UNSEEN = -2
+    RANGE_OPERATORS = {"$gt": operator.gt, "$gte": operator.ge, "$lt": operator.lt, "$lte": operator.le}
+
+    def __init__(self, capacity: int = 0):
+        self.capacity = capacity
+        self.codes: Dict[str, np.ndarray] = {}
+        self.vocab: Dict[str, Dict[Any, int]] = {}
+
+    @staticmethod
+    def _key(value):
+        # Chroma only stores scalars; anything else is compared by its JSON form.
+        # Booleans are tagged so True and 1 do not share a dictionary code
+        if isinstance(value, bool):
+            return ("bool", value)
+        return value if isinstance(value, (str, int, float)) else json.dumps(value, sort_keys=True, default=str)
+
+    def reserve(self, capacity: int):
+        if capacity <= self.capacity:
+            return
+        for key, column in self.codes.items():
+            grown = np.full(capacity, self.MISSING, dtype=np.int32)
+            grown[:self.capacity] = column
+            self.codes[key] = grown
+        self.capacity = capacity
+
+    def set(self, row: int, metadata: dict):
+        for key in metadata.keys() - self.codes.keys():
+            self.codes[key] = np.full(self.capacity, self.MISSING, dtype=np.int32)
+            self.vocab[key] = {}
+        for key, column in self.codes.items():
+            value = metadata.get(key)
+            if value is None:
+                column[row] = self.MISSING
+            else:
+                vocab = self.vocab[key]
+                column[row] = vocab.setdefault(self._key(value), len(vocab))
+
+    def _code(self, key: str, value) -> int:
+        if value is None:
+            return self.MISSING
+        return self.vocab.get(key, {}).get(self._key(value), self.UNSEEN)
+
+    def _column(self, key: str, size: int) -> np.ndarray:
+        column = self.codes.get(key)
+        return column[:size] if column is not None else np.full(size, self.MISSING, dtype=np.int32)
+
+    def _range_codes(self, key: str, op: str, operand) -> List[int]:
+        # Range operators are evaluated once per distinct stored value, then matched by code
+        if isinstance(operand, bool) or not isinstance(operand, (int, float)):
+            raise ValueError(f"{op} on {key} needs a number, got {operand!r}")
+        compare = self.RANGE_OPERATORS[op]
+        return [
+            code for value, code in self.vocab.get(key, {}).items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and compare(value, operand)
+        ]
+
+    def _condition(self, key: str, op: str, operand, size: int) -> np.ndarray:
+        column = self._column(key, size)
+        if op == "$eq":
+            return column == self._code(key, operand)
+        if op == "$in":
+            return np.isin(column, [self._code(key, value) for value in operand])
+        # Like Chroma, negations and ranges only match rows that have the field
+        present = column != self.MISSING
+        if op == "$ne":
+            return present & (column != self._code(key, operand))
+        if op == "$nin":
+            return present & ~np.isin(column, [self._code(key, value) for value in operand])
+        if op in self.RANGE_OPERATORS:
+            return np.isin(column, self._range_codes(key, op, operand))
+        raise ValueError(f"Unsupported where operator {op} on {key}")
+
+    def mask(self, where: Optional[dict], size: int) -> np.ndarray:
+        """Row mask for Chroma's metadata where syntax; unknown operators raise instead of matching everything"""
+        mask = np.ones(size, dtype=bool)
+        for key, condition in (where or {}).items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self.mask(clause, size)
+            elif key == "$or":
+                matched = np.zeros(size, dtype=bool)
+                for clause in condition:
+                    matched |= self.mask(clause, size)
+                mask &= matched
+            elif key.startswith("$"):
+                raise ValueError(f"Unsupported where operator {key}")
+            elif isinstance(condition, dict):
+                if not condition:
+                    raise ValueError(f"Empty where condition on {key}")
+                for op, operand in condition.items():
+                    mask &= self._condition(key, op, operand, size)
+            else:
+                mask &= self._column(key, size) == self._code(key, condition)
+        return mask
+
+class NumpyFlatBackend(VectorBackend):
+    """Exact search over a contiguous matrix of normalized vectors, persisted as a memory-mapped .npy"""
+
+    name = "numpy"
+    MIN_CAPACITY = 64
+
+    def __init__(self, collection_name: str, index_dir: Optional[str] = None, dtype: Optional[str] = None):
+        self.directory = Path(index_dir or os.getenv("VECTOR_INDEX_DIR", "./vector_index")) / collection_name
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # float16 halves memory at some query speed
+        self.dtype = np.dtype(dtype or os.getenv("VECTOR_INDEX_DTYPE", "float32"))
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+        # Writes are persisted by flush(); this catches anything still pending at interpreter exit
+        atexit.register(self.flush)
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.directory / "vectors.npy"
+
+    @property
+    def _records_path(self) -> Path:
+        return self.directory / "records.json"
+
+    def _load(self):
+        matrix = np.zeros((0, 0), dtype=self.dtype)
+        ids, documents, metadatas = [], [], []
+
+        if self._vectors_path.exists() and self._records_path.exists():
+            with open(self._records_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            ids, documents, metadatas = records["ids"], records["documents"], records["metadatas"]
+            # Read-only map: queries page vectors in from disk instead of copying the file
+            matrix = np.load(self._vectors_path, mmap_mode="r")
+            if matrix.dtype != self.dtype:
+                matrix = matrix.astype(self.dtype)
+
+        self._reset(matrix, ids, documents, metadatas, writable=False)
+        print(f"Flat index {self.directory.name} loaded with {len(ids)} vectors")
+
+    def _reset(self, matrix: np.ndarray, ids: List[str], documents: List[str], metadatas: List[dict], writable: bool):
+        self._matrix = matrix
+        self._writable = writable
+        self._size = len(ids)
+        self._ids, self._documents, self._metadatas = ids, documents, metadatas
+        self._positions = {doc_id: i for i, doc_id in enumerate(ids)}
+        self._columns = _MetadataColumns(len(ids))
+        for row, metadata in enumerate(metadatas):
+            self._columns.set(row, metadata)
+        self._publish()
+
+    def _publish(self):
+        # Readers grab this tuple once and only look at its first `size` rows, so appends never show them a half-written row
+        size = self._size
+        self._state = (self._matrix[:size], self._ids, self._documents, self._metadatas, self._positions, self._columns, size)
+
+    def _reserve(self, needed: int, dim: int):
+        """Grow the buffer by doubling so appends are amortized O(rows added)"""
+        if self._size and self._matrix.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match index dimension {self._matrix.shape[1]}")
+        if self._writable and needed <= self._matrix.shape[0]:
+            return
+        capacity = max(needed, 2 * self._size, self.MIN_CAPACITY)
+        buffer = np.zeros((capacity, dim), dtype=self.dtype)
+        if self._size:
+            buffer[:self._size] = self._matrix[:self._size]
+        # Snapshots taken before the swap keep the old buffer alive until their queries finish
+        self._matrix = buffer
+        self._writable = True
+        self._columns.reserve(capacity)
+
+    def _persist(self):
+        size = self._size
+        tmp_vectors = self.directory / "vectors.tmp.npy"
+        np.save(tmp_vectors, self._matrix[:size])
+        tmp_records = self.directory / "records.tmp.json"
+        with open(tmp_records, "w", encoding="utf-8") as f:
+            json.dump({"ids": self._ids[:size], "documents": self._documents[:size], "metadatas": self._metadatas[:size]}, f, ensure_ascii=False)
+        os.replace(tmp_vectors, self._vectors_path)
+        os.replace(tmp_records, self._records_path)
+
+    def flush(self):
+        """Write the index to disk if it changed since the last flush"""
+        with self._lock:
+            if self._dirty:
+                self._persist()
+                self._dirty = False
+
+    def _normalize(self, embeddings) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(self.dtype)
+
+    def count(self, where=None):
+        _, _, _, _, _, columns, size = self._state
+        if where:
+            return int(columns.mask(where, size).sum())
+        return size
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        vectors = self._normalize(embeddings)
+        with self._lock:
+            # Last write wins for ids repeated within one batch
+            latest = {doc_id: i for i, doc_id in enumerate(ids)}
+            added = sum(1 for doc_id in latest if doc_id not in self._positions)
+            self._reserve(self._size + added, vectors.shape[1])
+
+            rows = []
+            for doc_id, i in latest.items():
+                row = self._positions.get(doc_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._positions[doc_id] = row
+                    self._ids.append(doc_id)
+                    self._documents.append(documents[i])
+                    self._metadatas.append(metadatas[i])
+                else:
+                    # Replaced in place: a query running right now may score this row with either version
+                    self._documents[row] = documents[i]
+                    self._metadatas[row] = metadatas[i]
+                self._columns.set(row, metadatas[i])
+                rows.append(row)
+
+            self._matrix[rows] = vectors[list(latest.values())]
+            self._size = len(self._ids)
+            self._publish()
+            self._dirty = True
+
+    def query(self, embedding, n_results, where=None):
+        matrix, ids, documents, metadatas, _, columns, size = self._state
+        if not size or n_results <= 0:
+            return []
+
+        scores = (matrix @ self._normalize(embedding)[0]).astype(np.float32)
+        if where:
+            mask = columns.mask(where, size)
+            scores[~mask] = -np.inf
+            available = int(mask.sum())
+        else:
+            available = size
+
+        k = min(n_results, available)
+        if k == 0:
+            return []
+
+        # Partial selection of the k best, then sort only those
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"id": ids[i], "document": documents[i], "metadata": metadatas[i], "score": float(scores[i])}
+            for i in top
+        ]
+
+    def get(self, ids=None, where=None, limit=None):
+        _, all_ids, documents, metadatas, positions, columns, size = self._state
+        if ids is not None:
+            rows = [row for row in (positions.get(doc_id) for doc_id in ids) if row is not None and row < size]
+        else:
+            rows = range(size)
+        if where:
+            mask = columns.mask(where, size)
+            rows = [row for row in rows if mask[row]]
+        rows = rows[:limit] if limit else rows
+        return [{"id": all_ids[i], "document": documents[i], "metadata": metadatas[i]} for i in rows]
+
+    def delete(self, ids=None, where=None):
+        """Remove records matching both ids and where, as Chroma does; with neither given nothing is removed"""
+        if ids is None and not where:
+            return
+        with self._lock:
+            size = self._size
+            doomed = self._columns.mask(where, size)
+            if ids is not None:
+                selected = np.zeros(size, dtype=bool)
+                selected[[self._positions[doc_id] for doc_id in ids if doc_id in self._positions]] = True
+                doomed &= selected
+            if not doomed.any():
+                return
+            keep = np.flatnonzero(~doomed)
+            self._reset(
+                np.ascontiguousarray(np.asarray(self._matrix)[keep]),
+                [self._ids[i] for i in keep],
+                [self._documents[i] for i in keep],
+                [self._metadatas[i] for i in keep],
+                writable=True,
+            )
+            self._dirty = True
+
+def create_vector_backend(collection_name: str) -> VectorBackend:
+    """Backend selected by the VECTOR_BACKEND environment variable ("chroma" or "numpy")"""
+    backend = os.getenv("VECTOR_BACKEND", "chroma")
+    if backend == "numpy":
+        return NumpyFlatBackend(collection_name)
+    if backend == "chroma":
+        return ChromaBackend(collection_name)
+    raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
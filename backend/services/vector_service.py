@@ -1,35 +1,25 @@
 # Vector DB operations 
-import chromadb
-from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
 from typing import List, Dict, Optional
-import os
 import uuid
 from datetime import datetime
 from dotenv import load_dotenv
+from services.vector_backends import create_vector_backend
 
 load_dotenv()
 
 class VectorService:
     def __init__(self, collection_name: str = "educational_content"):
-        """Initialize ChromaDB client and embedding model"""
-        self.persist_directory = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
-        
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(path=self.persist_directory)
-        
+        """Initialize the vector backend (VECTOR_BACKEND) and embedding model"""
         # Initialize embedding model
         self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
         
         # Get or create collection
         self.collection_name = collection_name
-        self.collection = self.client.get_or_create_collection(
-            name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}
-        )
+        self.backend = create_vector_backend(self.collection_name)
         
-        print(f"Vector service initialized with collection: {self.collection_name}")
-        print(f"Current collection size: {self.collection.count()}")
+        print(f"Vector service initialized with collection: {self.collection_name} ({self.backend.name} backend)")
+        print(f"Current collection size: {self.backend.count()}")
     
     def add_educational_content(self, content: str, metadata: Dict, content_id: Optional[str] = None) -> str:
         """Add educational content to vector database"""
@@ -53,12 +43,13 @@ class VectorService:
             }
             
             # Add to collection
-            self.collection.add(
+            self.backend.upsert(
+                ids=[content_id],
                 embeddings=[embedding],
                 documents=[content],
-                metadatas=[processed_metadata],
-                ids=[content_id]
+                metadatas=[processed_metadata]
             )
+            self.backend.flush()
             
             print(f"Added content with ID: {content_id}")
             return content_id
@@ -100,12 +91,13 @@ class VectorService:
             content_ids.append(content_id)
         
         if embeddings:
-            self.collection.add(
+            self.backend.upsert(
+                ids=ids,
                 embeddings=embeddings,
                 documents=documents,
-                metadatas=metadatas,
-                ids=ids
+                metadatas=metadatas
             )
+            self.backend.flush()
             print(f"Added {len(embeddings)} contents in batch")
         
         return content_ids
@@ -119,32 +111,22 @@ class VectorService:
             # Create query embedding
             query_embedding = self.embedding_model.encode([query])[0].tolist()
             
-            # Prepare query parameters
-            query_params = {
-                "query_embeddings": [query_embedding],
-                "n_results": min(n_results, 100),  # Limit to reasonable number
-                "include": ["documents", "metadatas", "distances"]
-            }
-            
-            # Add filter if provided
-            if filter_metadata:
-                query_params["where"] = filter_metadata
-            
-            # Query the collection
-            results = self.collection.query(**query_params)
+            # Query the backend
+            matches = self.backend.query(
+                query_embedding,
+                n_results=min(n_results, 100),  # Limit to reasonable number
+                where=filter_metadata
+            )
             
             # Format results
             formatted_results = []
-            if results and results['documents'] and results['documents'][0]:
-                for i in range(len(results['documents'][0])):
-                    similarity_score = 1 - results['distances'][0][i]  # Convert distance to similarity
-                    
-                    formatted_results.append({
-                        "content": results['documents'][0][i],
-                        "metadata": results['metadatas'][0][i],
-                        "similarity_score": round(similarity_score, 4),
-                        "content_id": results['metadatas'][0][i].get('content_id', f'unknown_{i}')
-                    })
+            for i, match in enumerate(matches):
+                formatted_results.append({
+                    "content": match["document"],
+                    "metadata": match["metadata"],
+                    "similarity_score": round(match["score"], 4),
+                    "content_id": match["metadata"].get('content_id', f'unknown_{i}')
+                })
             
             # Sort by similarity score (highest first)
             formatted_results.sort(key=lambda x: x['similarity_score'], reverse=True)
@@ -166,15 +148,12 @@ class VectorService:
     def get_content_by_id(self, content_id: str) -> Optional[Dict]:
         """Get specific content by ID"""
         try:
-            results = self.collection.get(
-                ids=[content_id],
-                include=["documents", "metadatas"]
-            )
+            results = self.backend.get(ids=[content_id])
             
-            if results and results['documents']:
+            if results:
                 return {
-                    "content": results['documents'][0],
-                    "metadata": results['metadatas'][0],
+                    "content": results[0]['document'],
+                    "metadata": results[0]['metadata'],
                     "content_id": content_id
                 }
             
@@ -187,7 +166,8 @@ class VectorService:
     def delete_content(self, content_id: str) -> bool:
         """Delete content by ID"""
         try:
-            self.collection.delete(ids=[content_id])
+            self.backend.delete(ids=[content_id])
+            self.backend.flush()
             print(f"Deleted content with ID: {content_id}")
             return True
         except Exception as e:
@@ -197,20 +177,17 @@ class VectorService:
     def get_collection_stats(self) -> Dict:
         """Get collection statistics"""
         try:
-            count = self.collection.count()
+            count = self.backend.count()
             
             # Get sample of metadata to analyze topics
-            sample_results = self.collection.get(
-                limit=min(100, count),
-                include=["metadatas"]
-            )
+            sample_results = self.backend.get(limit=min(100, count))
             
             topics = {}
             subjects = {}
             difficulty_levels = {}
             
-            if sample_results and sample_results['metadatas']:
-                for metadata in sample_results['metadatas']:
+            if sample_results:
+                for metadata in (record['metadata'] for record in sample_results):
                     # Count topics
                     topic = metadata.get('topic', 'Unknown')
                     topics[topic] = topics.get(topic, 0) + 1
@@ -291,7 +268,7 @@ class VectorService:
         ]
         
         # Check if content already exists
-        current_count = self.collection.count()
+        current_count = self.backend.count()
         if current_count >= len(sample_contents):
             print(f"Sample content already exists ({current_count} documents)")
             return
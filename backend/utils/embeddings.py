@@ -1,6 +1,6 @@
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 import re
 
 class EmbeddingUtils:
@@ -48,17 +48,57 @@ class EmbeddingUtils:
         similarity = dot_product / (norm1 * norm2)
         return float(similarity)
     
-    def find_most_similar(self, query_embedding: List[float], candidate_embeddings: List[List[float]]) -> List[Tuple[int, float]]:
-        """Find most similar embeddings to query"""
-        similarities = []
-        
-        for i, candidate in enumerate(candidate_embeddings):
-            similarity = self.calculate_similarity(query_embedding, candidate)
-            similarities.append((i, similarity))
+    def find_most_similar(self, query_embedding: List[float], candidate_embeddings: List[List[float]], k: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Find most similar embeddings to query (all candidates, or the best k)"""
+        if not candidate_embeddings:
+            return []
+        if not query_embedding:
+            return [(i, 0.0) for i in range(len(candidate_embeddings))][:k]
         
-        # Sort by similarity (highest first)
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities
+        indices, scores = self.top_k_similar(query_embedding, candidate_embeddings, k or len(candidate_embeddings))
+        return [(int(i), float(score)) for i, score in zip(indices, scores)]
+    
+    @staticmethod
+    def normalize_embeddings(embeddings: Union[np.ndarray, List[List[float]]]) -> np.ndarray:
+        """L2-normalize rows into a float32 matrix; zero vectors stay zero"""
+        matrix = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+    
+    def top_k_similar(
+        self,
+        query_embeddings: Union[np.ndarray, List[float], List[List[float]]],
+        candidate_embeddings: Union[np.ndarray, List[List[float]]],
+        k: int = 5,
+        normalized: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k candidate indices and cosine scores for one or many queries in one matrix product"""
+        # normalized=True skips recomputing norms for matrices cached from normalize_embeddings;
+        # a 1-D query returns 1-D arrays, a query matrix returns one row per query
+        single_query = np.ndim(query_embeddings) == 1
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        candidates = np.atleast_2d(np.asarray(candidate_embeddings, dtype=np.float32))
+        if not normalized:
+            queries = self.normalize_embeddings(queries)
+            candidates = self.normalize_embeddings(candidates)
+        
+        scores = queries @ candidates.T
+        k = min(k, candidates.shape[0])
+        
+        # Partial selection of the best k per row, then sort only those k
+        if k < candidates.shape[0]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(candidates.shape[0]), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        
+        if single_query:
+            return top[0], top_scores[0]
+        return top, top_scores
     
     def preprocess_text(self, text: str) -> str:
         """Preprocess text before embedding"""
@@ -0,0 +1,30 @@
+import hashlib
+import os
+from typing import Tuple
+from fastapi import HTTPException, UploadFile
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+async def save_upload_file(upload: UploadFile, destination: str, max_bytes: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[str, int]:
+    """Stream an upload to disk in fixed-size chunks, returning its SHA-256 and size"""
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(destination, "wb") as buffer:
+            while True:
+                block = await upload.read(chunk_size)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"File exceeds the {max_bytes} byte upload limit")
+                digest.update(block)
+                buffer.write(block)
+    except Exception:
+        # Never leave a truncated file behind
+        if os.path.exists(destination):
+            os.remove(destination)
+        raise
+
+    return digest.hexdigest(), size